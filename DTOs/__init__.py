@@ -0,0 +1,26 @@
+"""Typed row objects returned by the database layer"""
+from DTOs.row_factory import (
+    RowConversionError,
+    row_builder,
+    row_factory,
+    to_bool,
+    to_decimal,
+)
+from DTOs.rows import (
+    FinancialRecordRow,
+    InventoryRow,
+    StudentRow,
+    UserRow,
+)
+
+__all__ = [
+    "FinancialRecordRow",
+    "InventoryRow",
+    "RowConversionError",
+    "StudentRow",
+    "UserRow",
+    "row_builder",
+    "row_factory",
+    "to_bool",
+    "to_decimal",
+]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Compare materializing rows as dicts and as row types.
+
+Fills an in-memory students table and reads it back both ways, reporting
+the best time of several runs and the memory held by the resulting list.
+
+Usage:
+    python -m DTOs.benchmark [rows] [repeat]
+"""
+import gc
+import sqlite3
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+# Local imports
+from DTOs.row_factory import row_factory
+from DTOs.rows import StudentRow
+
+BENCHMARK_ROWS = 50_000
+BENCHMARK_REPEAT = 5
+
+
+def _students_table(rows: int) -> sqlite3.Connection:
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        """
+        CREATE TABLE students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            birth_date TEXT NOT NULL,
+            phone TEXT,
+            dad_job TEXT,
+            mum_job TEXT,
+            problem TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            photo_path TEXT
+        )
+    """
+    )
+    connection.executemany(
+        """
+        INSERT INTO students (name, age, birth_date, phone, dad_job, mum_job, problem)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+        (
+            (
+                f"طالب {i}",
+                3 + i % 4,
+                f"20{18 + i % 5}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                f"010{i:08d}",
+                "مهندس",
+                "معلمة",
+                None if i % 3 else "حساسية",
+            )
+            for i in range(rows)
+        ),
+    )
+    connection.commit()
+    return connection
+
+
+def _read_dicts(connection: sqlite3.Connection) -> List[Dict]:
+    cursor = connection.cursor()
+    cursor.row_factory = sqlite3.Row
+    return [dict(row) for row in cursor.execute("SELECT * FROM students")]
+
+
+def _read_rows(connection: sqlite3.Connection) -> List[StudentRow]:
+    cursor = connection.cursor()
+    cursor.row_factory = row_factory(StudentRow)
+    return cursor.execute("SELECT * FROM students").fetchall()
+
+
+def _measure(read: Callable, connection: sqlite3.Connection, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        read(connection)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    rows = read(connection)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, held / len(rows)
+
+
+def benchmark(
+    rows: int = BENCHMARK_ROWS, repeat: int = BENCHMARK_REPEAT
+) -> Dict[str, Dict[str, float]]:
+    """Time and memory per row for dicts and StudentRow"""
+    connection = _students_table(rows)
+    try:
+        results = {}
+        for name, read in (("dict", _read_dicts), ("StudentRow", _read_rows)):
+            milliseconds, bytes_per_row = _measure(read, connection, repeat)
+            results[name] = {"ms": milliseconds, "bytes_per_row": bytes_per_row}
+        return results
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    try:
+        count = int(sys.argv[1]) if len(sys.argv) > 1 else BENCHMARK_ROWS
+        repeat = int(sys.argv[2]) if len(sys.argv) > 2 else BENCHMARK_REPEAT
+    except ValueError:
+        print(__doc__)
+        sys.exit(1)
+    print(f"Reading {count} students, best of {repeat}")
+    for name, result in benchmark(count, repeat).items():
+        print(
+            f"{name:>10}: {result['ms']:8.1f} ms "
+            f"{result['bytes_per_row']:8.0f} bytes/row"
+        )
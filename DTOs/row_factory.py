@@ -0,0 +1,151 @@
+"""Build row types straight from sqlite3 result tuples.
+
+``row_factory(RowType)`` returns a function for ``Cursor.row_factory``.
+The first row of a result works out, from the column names, where each
+field comes from and which ones need converting; every row after that is
+an ``itemgetter`` call that reorders the tuple in C, a handful of
+conversions and a ``tuple.__new__``. Columns are matched by name, so
+``SELECT *`` works whatever order migrations added the columns in. A value
+that cannot be converted raises ``RowConversionError`` instead of being
+passed through, so a field always holds its declared type (or None).
+"""
+import sqlite3
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from operator import itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    get_origin,
+    get_type_hints,
+)
+
+
+class RowConversionError(sqlite3.DataError):
+    """A stored value that does not convert to its field's type"""
+
+
+# Text spellings of flags; anything else stored as text is an error
+TRUE_STRINGS = frozenset({"1", "true", "t", "yes", "y", "on"})
+FALSE_STRINGS = frozenset({"0", "false", "f", "no", "n", "off", ""})
+
+
+def to_bool(value: Any) -> bool:
+    """Turn a stored flag (0/1 or its text spelling) into a bool"""
+    if isinstance(value, (int, float)):
+        return value != 0
+    if isinstance(value, bytes):
+        value = value.decode("ascii")
+    text = str(value).strip().lower()
+    if text in TRUE_STRINGS:
+        return True
+    if text in FALSE_STRINGS:
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def to_decimal(value: Any) -> Decimal:
+    """Turn a stored amount into an exact Decimal"""
+    # str() keeps 0.1 as 0.1 instead of its binary expansion
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+# Conversions applied to fields annotated with these types. They receive
+# non-NULL values and raise one of CONVERSION_ERRORS for values they reject.
+CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    date: date.fromisoformat,
+    datetime: datetime.fromisoformat,
+    Decimal: to_decimal,
+    bool: to_bool,
+}
+CONVERSION_ERRORS = (TypeError, ValueError, ArithmeticError)
+
+
+@lru_cache(maxsize=None)
+def field_converters(model: Type[tuple]) -> Tuple[Callable[[Any], Any], ...]:
+    """Return the converter of each field of ``model`` (None if not needed)"""
+    hints = get_type_hints(model)
+    converters = []
+    for field in model._fields:
+        hint = hints.get(field)
+        if get_origin(hint) is Union:
+            # Optional[X] -> X
+            args = [arg for arg in get_args(hint) if arg is not type(None)]
+            hint = args[0] if len(args) == 1 else None
+        converters.append(CONVERTERS.get(hint))
+    return tuple(converters)
+
+
+@lru_cache(maxsize=256)
+def row_builder(
+    model: Type[tuple], columns: Tuple[str, ...]
+) -> Callable[[tuple], tuple]:
+    """Return a function building ``model`` from rows with these columns"""
+    positions = {name: index for index, name in enumerate(columns)}
+    indexes: List[int] = []
+    defaults: List[Tuple[int, Any]] = []
+    for field_index, field in enumerate(model._fields):
+        if field in positions:
+            indexes.append(positions[field])
+        elif field in model._field_defaults:
+            defaults.append((field_index, model._field_defaults[field]))
+        else:
+            raise ValueError(f"{model.__name__}: query has no column {field!r}")
+    conversions = [
+        (field_index, convert)
+        for field_index, convert in enumerate(field_converters(model))
+        if convert is not None
+    ]
+
+    # Every row type has several required fields, so the getter returns a tuple
+    getter = itemgetter(*indexes)
+    new = tuple.__new__
+
+    if not defaults and not conversions:
+        return lambda row: new(model, getter(row))
+
+    def build(row: tuple) -> tuple:
+        values = list(getter(row))
+        for field_index, default in defaults:
+            values.insert(field_index, default)
+        for field_index, convert in conversions:
+            value = values[field_index]
+            if value is not None:
+                try:
+                    values[field_index] = convert(value)
+                except CONVERSION_ERRORS as e:
+                    raise RowConversionError(
+                        f"{model.__name__}.{model._fields[field_index]}: "
+                        f"cannot convert {value!r} ({e})"
+                    ) from e
+        return new(model, values)
+
+    return build
+
+
+@lru_cache(maxsize=None)
+def row_factory(model: Type[tuple]) -> Callable[[sqlite3.Cursor, tuple], tuple]:
+    """Return an sqlite3 row factory producing ``model`` instances"""
+    # The builder for the last result seen; cursor.description is the same
+    # object for every row of a result, so one identity check per row
+    # decides whether it still applies. The pair is replaced as a whole so
+    # threads sharing the factory never see a mismatched one.
+    last: Tuple[Any, Any] = (None, None)
+
+    def factory(cursor: sqlite3.Cursor, row: tuple) -> tuple:
+        nonlocal last
+        description, build = last
+        if description is not cursor.description:
+            description = cursor.description
+            build = row_builder(model, tuple(column[0] for column in description))
+            last = (description, build)
+        return build(row)
+
+    return factory
@@ -0,0 +1,62 @@
+"""Typed, immutable rows of the kindergarten tables.
+
+Each row type is a ``NamedTuple``: fields are read as attributes, instances
+cannot be modified and carry no per-instance ``__dict__``, so a cached
+student costs a tuple instead of a dictionary. Field types drive the
+conversions done by ``DTOs.row_factory`` when rows are read: timestamps
+become ``datetime``, money becomes ``Decimal`` and flags become ``bool``.
+Text columns that other tools may fill in any format, such as
+``birth_date``, stay ``str`` so a field never holds a mix of parsed and
+unparsed values. Trailing fields with defaults may be missing from a query
+(e.g. ``version`` before migration 5).
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+
+class UserRow(NamedTuple):
+    id: int
+    username: str
+    hashed_password: str
+    role: str
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int = 0
+
+
+class StudentRow(NamedTuple):
+    id: int
+    name: str
+    age: int
+    birth_date: str  # YYYY-MM-DD, kept as stored
+    phone: Optional[str]
+    dad_job: Optional[str]
+    mum_job: Optional[str]
+    problem: Optional[str] = None
+    photo_path: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class FinancialRecordRow(NamedTuple):
+    id: Optional[int]
+    student_id: int
+    monthly_fee: Decimal
+    bus_fee: Optional[Decimal]
+    month_year: str  # YYYY-MM
+    paid: bool = False
+    payment_date: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    student_name: Optional[str] = None  # joined from students
+
+
+class InventoryRow(NamedTuple):
+    id: int
+    item_name: str
+    quantity: int
+    purchase_price: Decimal
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,56 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Local imports
+from database import ASYNC_DB_WORKERS, KindergartenDatabase, db
+
+
+class AsyncKindergartenDatabase:
+    """Awaitable facade over KindergartenDatabase.
+
+    Every call runs on a bounded thread pool so Flet event handlers can
+    ``await`` database work without blocking the event loop; clocks,
+    spinners and other sessions keep running meanwhile. Methods of the
+    wrapped database are exposed with the same names and arguments::
+
+        students = await async_db.get_students_page(50)
+
+    ``run`` executes any other blocking callable (file copies, image
+    resizing) on the same pool. Password checks have their own pool, see
+    ``password_hashing.run_hashing``.
+    """
+
+    def __init__(self, database: KindergartenDatabase, max_workers: int = 4):
+        self.database = database
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="kindergarten-db"
+        )
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the worker pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.database, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            return await self.run(attribute, *args, **kwargs)
+
+        return call
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker threads once queued calls have finished"""
+        self.executor.shutdown(wait=wait)
+
+
+# Global async facade over the global database instance, whose connection
+# pool has room for all of its workers
+async_db = AsyncKindergartenDatabase(db, max_workers=ASYNC_DB_WORKERS)
@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from typing import Any, Dict, Iterator, Optional, Union
+
+# Pragma presets applied to every pooled connection. Both use WAL so readers
+# never block the writer; "durable" still fsyncs on every commit while "fast"
+# only syncs at checkpoints, which survives an application crash but may lose
+# the last transactions on power failure.
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,  # KiB
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,  # KiB
+        "mmap_size": 268435456,  # 256 MiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # ms
+    },
+}
+
+DEFAULT_PRAGMA_PROFILE = "fast"
+
+
+class ConnectionPool:
+    """Thread-safe pool of SQLite connections for a single database file.
+
+    A thread checks out one connection and keeps it for the duration of the
+    outermost ``connection()`` block, so nested calls on the same thread reuse
+    it instead of opening another. Idle connections are kept open between
+    checkouts, which means connection setup (and schema parsing) happens once
+    per connection rather than once per query.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        size: int = 5,
+        timeout: float = 10.0,
+        must_exist: bool = True,
+        pragmas: Optional[Dict[str, Any]] = None,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.must_exist = must_exist
+        self.pragmas = dict(pragmas or {})
+        self._idle: "LifoQueue[sqlite3.Connection]" = LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        if self.must_exist and not os.path.exists(self.db_path):
+            print(f"Database file {self.db_path} not found.")
+            raise sqlite3.OperationalError(f"Database file {self.db_path} not found")
+
+        connection = sqlite3.connect(
+            self.db_path, timeout=self.timeout, check_same_thread=False
+        )
+        connection.row_factory = sqlite3.Row
+        apply_pragmas(connection, self.pragmas)
+        return connection
+
+    def _acquire(self) -> sqlite3.Connection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                "Timed out waiting for a database connection"
+            )
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        try:
+            return self._open()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, connection: sqlite3.Connection):
+        try:
+            if connection.in_transaction:
+                # Never hand an open transaction to the next borrower
+                connection.rollback()
+            self._idle.put_nowait(connection)
+        except sqlite3.Error:
+            _close_quietly(connection)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out this thread's connection for the duration of the block"""
+        local = self._local
+        if getattr(local, "depth", 0):
+            local.depth += 1
+            try:
+                yield local.connection
+            finally:
+                local.depth -= 1
+            return
+
+        connection = self._acquire()
+        local.connection = connection
+        local.depth = 1
+        try:
+            yield connection
+        except BaseException:
+            if connection.in_transaction:
+                connection.rollback()
+            raise
+        finally:
+            local.depth = 0
+            local.connection = None
+            self._release(connection)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection and commit on success, roll back on error"""
+        with self.connection() as connection:
+            try:
+                yield connection
+            except BaseException:
+                if connection.in_transaction:
+                    connection.rollback()
+                raise
+            else:
+                connection.commit()
+
+    def current(self) -> Optional[sqlite3.Connection]:
+        """Return the connection held by the calling thread, if any"""
+        return getattr(self._local, "connection", None)
+
+    def close_all(self):
+        """Close every idle connection in the pool"""
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except Empty:
+                break
+            _close_quietly(connection)
+
+
+def resolve_pragmas(
+    profile: Union[str, Dict[str, Any], None] = DEFAULT_PRAGMA_PROFILE,
+    **overrides: Any,
+) -> Dict[str, Any]:
+    """Return the pragma settings for a preset name or explicit mapping"""
+    if profile is None:
+        pragmas = {}
+    elif isinstance(profile, str):
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown pragma profile: {profile}")
+        pragmas = dict(PRAGMA_PROFILES[profile])
+    else:
+        pragmas = dict(profile)
+    pragmas.update(overrides)
+    return pragmas
+
+
+def apply_pragmas(connection: sqlite3.Connection, pragmas: Dict[str, Any]):
+    """Apply PRAGMA settings to a freshly opened connection"""
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name} = {value}")
+
+
+def _close_quietly(connection: sqlite3.Connection):
+    try:
+        connection.close()
+    except sqlite3.Error:
+        pass
@@ -1,49 +1,102 @@
-import json
 import os
 import sqlite3
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+# Local imports
+from DTOs import (
+    FinancialRecordRow,
+    InventoryRow,
+    StudentRow,
+    UserRow,
+    row_factory,
+)
+from connection_pool import (
+    DEFAULT_PRAGMA_PROFILE,
+    ConnectionPool,
+    apply_pragmas,
+    resolve_pragmas,
+)
+from migrations import run_migrations
+from password_hashing import HASHING_WORKERS
+from stats_cache import StatsCache
+from text_search import fts_query, like_pattern
+
+# Keyset cursor: the (sort value, id) pair of a boundary row
+Cursor = Tuple[Any, int]
+
+
+class Page(NamedTuple):
+    """One page of rows with the cursors needed to fetch its neighbours"""
+
+    rows: List[Any]  # row types from DTOs
+    next_cursor: Optional[Cursor]  # pass as ``after`` to get the next page
+    prev_cursor: Optional[Cursor]  # pass as ``before`` to get the previous page
 
 
 class KindergartenDatabase:
-    def __init__(self, db_path: str = "kindergarten.db"):
+    def __init__(
+        self,
+        db_path: str = "kindergarten.db",
+        pool_size: int = 5,
+        pragma_profile: Union[str, Dict[str, Any], None] = None,
+    ):
         self.db_path = db_path
-        self.connection = None
+        if pragma_profile is None:
+            pragma_profile = os.environ.get(
+                "KINDERGARTEN_DB_PROFILE", DEFAULT_PRAGMA_PROFILE
+            )
+        self.pragmas = resolve_pragmas(pragma_profile)
+        self.pool = ConnectionPool(db_path, size=pool_size, pragmas=self.pragmas)
+        self.stats_cache = StatsCache()
+
+    @staticmethod
+    def _rows(
+        connection: sqlite3.Connection, model: type, query: str, params: Any = ()
+    ) -> List[Any]:
+        """Run a query and return its rows as instances of a DTOs row type"""
+        cursor = connection.cursor()
+        cursor.row_factory = row_factory(model)
+        return cursor.execute(query, params).fetchall()
 
     def connect(self):
-        """Establish connection to the database"""
-        if not os.path.exists(self.db_path):
-            print(f"Database file {self.db_path} not found.")
-            return False
+        """Check that a pooled connection to the database can be opened"""
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
-            return True
+            with self.pool.connection():
+                return True
         except sqlite3.Error as e:
             print(f"Database connection error: {e}")
             return False
 
     def close(self):
-        """Close database connection"""
-        if self.connection:
-            self.connection.close()
+        """Close idle pooled connections"""
+        self.pool.close_all()
 
     def initialize_database(self):
         """Initialize the database with all required tables"""
         print(f"Initializing database at: {self.db_path}")
-        
+
         # Create the database file if it doesn't exist
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
+            connection = sqlite3.connect(self.db_path)
+            apply_pragmas(connection, self.pragmas)
             print("Database connection established successfully")
-            print("DEBUG: About to create tables...")
         except sqlite3.Error as e:
             print(f"Database connection error: {e}")
             return False
 
         try:
-            cursor = self.connection.cursor()
+            cursor = connection.cursor()
 
             # Create Users table
             cursor.execute(
@@ -127,116 +180,294 @@ class KindergartenDatabase:
             """
             )
 
-            self.connection.commit()
-            print("Database initialized successfully!")
+            connection.commit()
             print("Tables created successfully!")
+
+            # Bring older databases up to the current schema version
+            run_migrations(connection)
+            print("Database initialized successfully!")
             return True
 
         except sqlite3.Error as e:
             print(f"Database initialization error: {e}")
             return False
         finally:
-            self.close()
+            connection.close()
+
+    # User operations
+    def create_user(
+        self, username: str, hashed_password: str, role: str = "user"
+    ) -> bool:
+        """Create a new user"""
+        try:
+            with self.pool.connection() as connection:
+                connection.execute(
+                    """
+                    INSERT INTO users (username, hashed_password, role)
+                    VALUES (?, ?, ?)
+                """,
+                    (username, hashed_password, role),
+                )
+                connection.commit()
+            self.stats_cache.bump("users")
+            return True
 
-    def migrate_users_from_json(self, json_file_path: str = "users.json"):
-        """Migrate users from JSON file to database"""
-        if not os.path.exists(json_file_path):
-            print(f"JSON file {json_file_path} not found")
+        except sqlite3.Error:
             return False
 
+    def update_password(self, username: str, hashed_password: str) -> bool:
+        """Replace a user's password hash; returns False if no user matched"""
         try:
-            with open(json_file_path, "r", encoding="utf-8") as f:
-                users_data = json.load(f)
-
-            if not self.connect():
-                return False
+            with self.pool.connection() as connection:
+                cursor = connection.execute(
+                    """
+                    UPDATE users
+                    SET hashed_password = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE username = ?
+                """,
+                    (hashed_password, username),
+                )
+                connection.commit()
+            self.stats_cache.bump("users")
+            return cursor.rowcount > 0
 
-            cursor = self.connection.cursor()
+        except sqlite3.Error as e:
+            print(f"Error updating password: {e}")
+            return False
 
-            for user_data in users_data:
-                cursor.execute(
+    def set_role(self, username: str, role: str) -> bool:
+        """Change a user's role; returns False if no user matched"""
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.execute(
                     """
-                    INSERT OR IGNORE INTO users (username, hashed_password, role)
-                    VALUES (?, ?, ?)
+                    UPDATE users SET role = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE username = ?
                 """,
-                    (
-                        user_data["username"],
-                        user_data["hashed_password"],
-                        user_data["role"],
-                    ),
+                    (role, username),
                 )
+                connection.commit()
+            self.stats_cache.bump("users")
+            return cursor.rowcount > 0
 
-            self.connection.commit()
-            print(f"Migrated {len(users_data)} users from JSON to database")
-            return True
-
-        except Exception as e:
-            print(f"Migration error: {e}")
+        except sqlite3.Error as e:
+            print(f"Error setting role: {e}")
             return False
-        finally:
-            self.close()
 
-    # User operations
-    def create_user(
-        self, username: str, hashed_password: str, role: str = "user"
-    ) -> bool:
-        """Create a new user"""
+    def upsert_users(self, users: Iterable[Tuple[str, str, str]]) -> int:
+        """Create or update many users in one transaction.
+
+        ``users`` yields ``(username, hashed_password, role)`` tuples; existing
+        usernames get the new hash and role. Returns the number of users
+        written, or 0 if any write failed (nothing is saved in that case).
+        """
         try:
-            if not self.connect():
-                return False
+            with self.pool.transaction() as connection:
+                cursor = connection.executemany(
+                    """
+                    INSERT INTO users (username, hashed_password, role)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(username) DO UPDATE SET
+                        hashed_password = excluded.hashed_password,
+                        role = excluded.role,
+                        updated_at = CURRENT_TIMESTAMP
+                """,
+                    users,
+                )
+                written = cursor.rowcount
+            self.stats_cache.bump("users")
+            return written
 
-            cursor = self.connection.cursor()
-            cursor.execute(
-                """
-                INSERT INTO users (username, hashed_password, role)
-                VALUES (?, ?, ?)
-            """,
-                (username, hashed_password, role),
-            )
+        except sqlite3.Error as e:
+            print(f"Error upserting users: {e}")
+            return 0
 
-            self.connection.commit()
-            return True
+    def bulk_create_users(self, users: Iterable[Tuple[str, str, str]]) -> int:
+        """Create many users in one transaction.
 
-        except sqlite3.Error:
-            return False
-        finally:
-            self.close()
+        ``users`` yields ``(username, hashed_password, role)`` tuples. Returns
+        the number of users added, or 0 if any insert failed, e.g. on an
+        existing username (nothing is saved in that case).
+        """
+        try:
+            with self.pool.transaction() as connection:
+                cursor = connection.executemany(
+                    """
+                    INSERT INTO users (username, hashed_password, role)
+                    VALUES (?, ?, ?)
+                """,
+                    users,
+                )
+                added = cursor.rowcount
+            self.stats_cache.bump("users")
+            return added
 
-    def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        except sqlite3.Error as e:
+            print(f"Error adding users: {e}")
+            return 0
+
+    def get_user(self, username: str) -> Optional[UserRow]:
         """Get user by username"""
         try:
-            if not self.connect():
-                return None
+            with self.pool.connection() as connection:
+                users = self._rows(
+                    connection,
+                    UserRow,
+                    "SELECT * FROM users WHERE username = ?",
+                    (username,),
+                )
 
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-            user = cursor.fetchone()
+            return users[0] if users else None
 
-            if user:
-                return dict(user)
+        except sqlite3.Error:
             return None
 
+    def get_all_users(self) -> List[UserRow]:
+        """Get all users"""
+        try:
+            with self.pool.connection() as connection:
+                return self._rows(
+                    connection, UserRow, "SELECT * FROM users ORDER BY username"
+                )
+
         except sqlite3.Error:
+            return []
+
+    def get_users_page(
+        self,
+        limit: int = 50,
+        after: Optional[Cursor] = None,
+        before: Optional[Cursor] = None,
+    ) -> Page:
+        """Get one page of users ordered by username"""
+        return self._fetch_page("users", UserRow, "username", limit, after, before)
+
+    def iter_users(self, chunk_size: int = 500) -> Iterator[List[UserRow]]:
+        """Yield all users ordered by username in chunks"""
+        return self._iter_chunks("users", UserRow, "username", chunk_size)
+
+    def get_table_version(self, table: str) -> Optional[int]:
+        """Get the change counter of a table kept by triggers (None on error)"""
+        try:
+            with self.pool.connection() as connection:
+                row = connection.execute(
+                    "SELECT version FROM table_versions WHERE table_name = ?",
+                    (table,),
+                ).fetchone()
+
+            return row[0] if row else None
+
+        except sqlite3.Error as e:
+            print(f"Error reading table version: {e}")
             return None
-        finally:
-            self.close()
 
-    def get_all_users(self) -> List[Dict[str, Any]]:
-        """Get all users"""
+    def get_users_since(
+        self, version: int
+    ) -> Optional[Tuple[int, int, List[UserRow]]]:
+        """Get users changed after a version of the users table.
+
+        Returns the current table version, the number of users and the
+        changed rows, all read from one snapshot; None on error.
+        """
         try:
-            if not self.connect():
-                return []
+            with self.pool.connection() as connection:
+                connection.execute("BEGIN")
+                try:
+                    (current,) = connection.execute(
+                        "SELECT version FROM table_versions WHERE table_name = 'users'"
+                    ).fetchone()
+                    (count,) = connection.execute(
+                        "SELECT COUNT(*) FROM users"
+                    ).fetchone()
+                    users = self._rows(
+                        connection,
+                        UserRow,
+                        "SELECT * FROM users WHERE version > ?",
+                        (version,),
+                    )
+                finally:
+                    connection.rollback()
+
+            return current, count, users
+
+        except (sqlite3.Error, TypeError) as e:
+            print(f"Error reading changed users: {e}")
+            return None
 
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT * FROM users ORDER BY username")
-            users = cursor.fetchall()
+    def get_user_ids(self) -> List[int]:
+        """Get the ids of all users"""
+        try:
+            with self.pool.connection() as connection:
+                rows = connection.execute("SELECT id FROM users").fetchall()
 
-            return [dict(user) for user in users]
+            return [row[0] for row in rows]
 
         except sqlite3.Error:
             return []
-        finally:
-            self.close()
+
+    # Login lockout operations
+    def get_login_lockouts(self, now: float) -> Dict[str, float]:
+        """Get lockouts still active at Unix time ``now`` as key -> locked until"""
+        try:
+            with self.pool.connection() as connection:
+                rows = connection.execute(
+                    "SELECT key, locked_until FROM login_lockouts "
+                    "WHERE locked_until > ?",
+                    (now,),
+                ).fetchall()
+
+            return {row[0]: row[1] for row in rows}
+
+        except sqlite3.Error as e:
+            print(f"Error reading login lockouts: {e}")
+            return {}
+
+    def add_login_lockouts(self, lockouts: List[Tuple[str, float]]) -> bool:
+        """Record (key, locked until) lockouts, replacing older ones"""
+        try:
+            with self.pool.connection() as connection:
+                connection.executemany(
+                    """
+                    INSERT INTO login_lockouts (key, locked_until) VALUES (?, ?)
+                    ON CONFLICT(key) DO UPDATE SET locked_until = excluded.locked_until
+                """,
+                    lockouts,
+                )
+                connection.commit()
+            return True
+
+        except sqlite3.Error as e:
+            print(f"Error saving login lockouts: {e}")
+            return False
+
+    def delete_login_lockouts(self, keys: List[str]) -> bool:
+        """Lift lockouts by key"""
+        try:
+            with self.pool.connection() as connection:
+                connection.executemany(
+                    "DELETE FROM login_lockouts WHERE key = ?",
+                    [(key,) for key in keys],
+                )
+                connection.commit()
+            return True
+
+        except sqlite3.Error as e:
+            print(f"Error deleting login lockouts: {e}")
+            return False
+
+    def delete_expired_login_lockouts(self, now: float) -> int:
+        """Remove lockouts that ended before Unix time ``now``"""
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.execute(
+                    "DELETE FROM login_lockouts WHERE locked_until <= ?", (now,)
+                )
+                connection.commit()
+            return cursor.rowcount
+
+        except sqlite3.Error as e:
+            print(f"Error deleting expired login lockouts: {e}")
+            return 0
 
     # Student operations
     def create_student(
@@ -251,49 +482,164 @@ class KindergartenDatabase:
         photo_path: str = None,
     ) -> int:
         """Create a new student and return student ID"""
+        student = self.insert_student(
+            name, age, birth_date, phone, dad_job, mum_job, problem, photo_path
+        )
+        return student.id if student else -1
+
+    def insert_student(
+        self,
+        name: str,
+        age: int,
+        birth_date: str,
+        phone: str,
+        dad_job: str,
+        mum_job: str,
+        problem: str,
+        photo_path: str = None,
+    ) -> Optional[StudentRow]:
+        """Create a new student and return the stored row (None on failure)"""
         try:
-            if not self.connect():
-                return -1
+            with self.pool.connection() as connection:
+                try:
+                    (student,) = self._rows(
+                        connection,
+                        StudentRow,
+                        """
+                        INSERT INTO students (name, age, birth_date, phone, dad_job, mum_job, problem, photo_path, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                        RETURNING *
+                    """,
+                        (name, age, birth_date, phone, dad_job, mum_job, problem, photo_path),
+                    )
+                except sqlite3.Error as e:
+                    print(f"Error adding student: {e}")
+                    return None
+
+                connection.commit()
+            self.stats_cache.bump("students")
+            return student
 
-            cursor = self.connection.cursor()
-            try:
-                cursor.execute(
+        except sqlite3.Error as e:
+            print(f"Database error in insert_student: {e}")
+            return None
+
+    def create_students(
+        self, students: Iterable[Tuple[str, int, str, str, str, str, str]]
+    ) -> int:
+        """Create many students in one transaction.
+
+        ``students`` yields ``(name, age, birth_date, phone, dad_job, mum_job,
+        problem)`` tuples. Returns the number of students added, or 0 if any
+        insert failed (nothing is saved in that case).
+        """
+        try:
+            with self.pool.transaction() as connection:
+                cursor = connection.executemany(
                     """
-                    INSERT INTO students (name, age, birth_date, phone, dad_job, mum_job, problem, photo_path, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                    INSERT INTO students (name, age, birth_date, phone, dad_job, mum_job, problem, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
                 """,
-                    (name, age, birth_date, phone, dad_job, mum_job, problem, photo_path),
+                    students,
                 )
-            except sqlite3.Error as e:
-                print(f"Error adding student: {e}")
-                return -1
-                
-            student_id = cursor.lastrowid
-            self.connection.commit()
-            return student_id
+                added = cursor.rowcount
+            self.stats_cache.bump("students")
+            return added
 
         except sqlite3.Error as e:
-            print(f"Database error in create_student: {e}")
-            return -1
-        finally:
-            self.close()
+            print(f"Error adding students: {e}")
+            return 0
 
-    def get_all_students(self) -> List[Dict[str, Any]]:
-        """Get all students"""
+    def get_student(self, student_id: int) -> Optional[StudentRow]:
+        """Get student by ID"""
         try:
-            if not self.connect():
-                return []
+            with self.pool.connection() as connection:
+                students = self._rows(
+                    connection,
+                    StudentRow,
+                    "SELECT * FROM students WHERE id = ?",
+                    (student_id,),
+                )
 
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT * FROM students ORDER BY name")
-            students = cursor.fetchall()
+            return students[0] if students else None
 
-            return [dict(student) for student in students]
+        except sqlite3.Error:
+            return None
+
+    def get_all_students(self) -> List[StudentRow]:
+        """Get all students"""
+        try:
+            with self.pool.connection() as connection:
+                return self._rows(
+                    connection, StudentRow, "SELECT * FROM students ORDER BY name"
+                )
 
         except sqlite3.Error:
             return []
-        finally:
-            self.close()
+
+    def get_students_page(
+        self,
+        limit: int = 50,
+        after: Optional[Cursor] = None,
+        before: Optional[Cursor] = None,
+    ) -> Page:
+        """Get one page of students ordered by name"""
+        return self._fetch_page("students", StudentRow, "name", limit, after, before)
+
+    def iter_students(self, chunk_size: int = 500) -> Iterator[List[StudentRow]]:
+        """Yield all students ordered by name in chunks"""
+        return self._iter_chunks("students", StudentRow, "name", chunk_size)
+
+    def search_students(self, query: str, limit: int = 50) -> List[StudentRow]:
+        """Search students by name, phone, parents' jobs and notes.
+
+        Every word of ``query`` must match the start of a word in the
+        student's record; Arabic letter variants and diacritics are ignored.
+        Results are ranked by relevance, with name matches weighted highest.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        try:
+            with self.pool.connection() as connection:
+                return self._rows(
+                    connection,
+                    StudentRow,
+                    """
+                    SELECT s.* FROM students_fts
+                    JOIN students AS s ON s.id = students_fts.rowid
+                    WHERE students_fts MATCH ?
+                    ORDER BY bm25(students_fts, 10.0, 5.0, 1.0, 1.0, 1.0)
+                    LIMIT ?
+                    """,
+                    (match, limit),
+                )
+
+        except sqlite3.Error as e:
+            print(f"Error searching students: {e}")
+            return []
+
+    def get_photo_reference_counts(self) -> Optional[Dict[str, int]]:
+        """Get how many students reference each stored photo (None on error).
+
+        Garbage collection deletes whatever is not listed here, so an error
+        must not look like "no references".
+        """
+        try:
+            with self.pool.connection() as connection:
+                rows = connection.execute(
+                    """
+                    SELECT photo_path, COUNT(*) FROM students
+                    WHERE photo_path IS NOT NULL AND photo_path != ''
+                    GROUP BY photo_path
+                    """
+                ).fetchall()
+
+            return {path: count for path, count in rows}
+
+        except sqlite3.Error as e:
+            print(f"Error counting photo references: {e}")
+            return None
 
     # Parent operations
     def add_parent(
@@ -301,25 +647,19 @@ class KindergartenDatabase:
     ) -> bool:
         """Add a parent for a student"""
         try:
-            if not self.connect():
-                return False
-
-            cursor = self.connection.cursor()
-            cursor.execute(
-                """
-                INSERT INTO parents (student_id, name, job, relationship)
-                VALUES (?, ?, ?, ?)
-            """,
-                (student_id, name, job, relationship),
-            )
-
-            self.connection.commit()
+            with self.pool.connection() as connection:
+                connection.execute(
+                    """
+                    INSERT INTO parents (student_id, name, job, relationship)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    (student_id, name, job, relationship),
+                )
+                connection.commit()
             return True
 
         except sqlite3.Error:
             return False
-        finally:
-            self.close()
 
     # Financial operations
     def add_financial_record(
@@ -327,25 +667,115 @@ class KindergartenDatabase:
     ) -> bool:
         """Add financial record for a student"""
         try:
-            if not self.connect():
-                return False
-
-            cursor = self.connection.cursor()
-            cursor.execute(
-                """
-                INSERT INTO financial_records (student_id, monthly_fee, bus_fee, month_year)
-                VALUES (?, ?, ?, ?)
-            """,
-                (student_id, monthly_fee, bus_fee, month_year),
-            )
-
-            self.connection.commit()
+            with self.pool.connection() as connection:
+                connection.execute(
+                    """
+                    INSERT INTO financial_records (student_id, monthly_fee, bus_fee, month_year)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    (student_id, monthly_fee, bus_fee, month_year),
+                )
+                connection.commit()
+            self.stats_cache.bump("financial_records")
             return True
 
         except sqlite3.Error:
             return False
-        finally:
-            self.close()
+
+    def get_financial_records(
+        self, limit: Optional[int] = 100, student_id: Optional[int] = None
+    ) -> List[FinancialRecordRow]:
+        """Get the most recent financial records with their student names"""
+        query = """
+            SELECT financial_records.*, students.name AS student_name
+            FROM financial_records
+            JOIN students ON students.id = financial_records.student_id
+        """
+        params: List[Any] = []
+        if student_id is not None:
+            query += " WHERE financial_records.student_id = ?"
+            params.append(student_id)
+        query += " ORDER BY financial_records.id DESC LIMIT ?"
+        params.append(-1 if limit is None else limit)
+
+        try:
+            with self.pool.connection() as connection:
+                return self._rows(connection, FinancialRecordRow, query, params)
+
+        except sqlite3.Error:
+            return []
+
+    def iter_financial_records(
+        self, chunk_size: int = 500
+    ) -> Iterator[List[FinancialRecordRow]]:
+        """Yield all financial records with their student names in chunks"""
+        last_id = 0
+        while True:
+            try:
+                with self.pool.connection() as connection:
+                    records = self._rows(
+                        connection,
+                        FinancialRecordRow,
+                        """
+                        SELECT financial_records.*, students.name AS student_name
+                        FROM financial_records
+                        JOIN students ON students.id = financial_records.student_id
+                        WHERE financial_records.id > ?
+                        ORDER BY financial_records.id
+                        LIMIT ?
+                    """,
+                        (last_id, chunk_size),
+                    )
+            except sqlite3.Error:
+                return
+
+            if not records:
+                return
+            yield records
+            if len(records) < chunk_size:
+                return
+            last_id = records[-1].id
+
+    def search_financial_records(
+        self, query: str, limit: int = 100
+    ) -> List[FinancialRecordRow]:
+        """Get recent financial records whose student name or month matches"""
+        pattern = like_pattern(query.strip())
+        try:
+            with self.pool.connection() as connection:
+                return self._rows(
+                    connection,
+                    FinancialRecordRow,
+                    """
+                    SELECT financial_records.*, students.name AS student_name
+                    FROM financial_records
+                    JOIN students ON students.id = financial_records.student_id
+                    WHERE students.name LIKE :pattern ESCAPE '\\'
+                        OR financial_records.month_year LIKE :pattern ESCAPE '\\'
+                    ORDER BY financial_records.id DESC
+                    LIMIT :limit
+                """,
+                    {"pattern": pattern, "limit": limit},
+                )
+
+        except sqlite3.Error as e:
+            print(f"Error searching financial records: {e}")
+            return []
+
+    def get_financial_total(self) -> float:
+        """Get the sum of monthly and bus fees over all financial records"""
+        try:
+            with self.pool.connection() as connection:
+                row = connection.execute(
+                    """
+                    SELECT COALESCE(SUM(monthly_fee + COALESCE(bus_fee, 0)), 0)
+                    FROM financial_records
+                """
+                ).fetchone()
+            return row[0]
+
+        except sqlite3.Error:
+            return 0
 
     # Inventory operations
     def add_inventory_item(
@@ -353,54 +783,228 @@ class KindergartenDatabase:
     ) -> bool:
         """Add inventory item"""
         try:
-            if not self.connect():
-                return False
-
-            cursor = self.connection.cursor()
-            cursor.execute(
-                """
-                INSERT INTO inventory (item_name, quantity, purchase_price, description)
-                VALUES (?, ?, ?, ?)
-            """,
-                (item_name, quantity, purchase_price, description),
-            )
-
-            self.connection.commit()
+            with self.pool.connection() as connection:
+                connection.execute(
+                    """
+                    INSERT INTO inventory (item_name, quantity, purchase_price, description)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    (item_name, quantity, purchase_price, description),
+                )
+                connection.commit()
+            self.stats_cache.bump("inventory")
             return True
 
         except sqlite3.Error:
             return False
-        finally:
-            self.close()
 
-    def get_all_inventory(self) -> List[Dict[str, Any]]:
-        """Get all inventory items"""
+    def add_inventory_items(
+        self, items: Iterable[Tuple[str, int, float, str]]
+    ) -> int:
+        """Add many inventory items in one transaction.
+
+        ``items`` yields ``(item_name, quantity, purchase_price, description)``
+        tuples and may be a generator; it is consumed by ``executemany``
+        without building a list. Returns the number of items added, or 0 if
+        any insert failed (nothing is saved in that case).
+        """
         try:
-            if not self.connect():
-                return []
+            with self.pool.transaction() as connection:
+                cursor = connection.executemany(
+                    """
+                    INSERT INTO inventory (item_name, quantity, purchase_price, description)
+                    VALUES (?, ?, ?, ?)
+                """,
+                    items,
+                )
+                added = cursor.rowcount
+            self.stats_cache.bump("inventory")
+            return added
 
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT * FROM inventory ORDER BY item_name")
-            items = cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Error adding inventory items: {e}")
+            return 0
 
-            return [dict(item) for item in items]
+    def get_all_inventory(self) -> List[InventoryRow]:
+        """Get all inventory items"""
+        try:
+            with self.pool.connection() as connection:
+                return self._rows(
+                    connection,
+                    InventoryRow,
+                    "SELECT * FROM inventory ORDER BY item_name",
+                )
 
         except sqlite3.Error:
             return []
-        finally:
-            self.close()
 
+    def get_inventory_page(
+        self,
+        limit: int = 50,
+        after: Optional[Cursor] = None,
+        before: Optional[Cursor] = None,
+    ) -> Page:
+        """Get one page of inventory items ordered by item name"""
+        return self._fetch_page(
+            "inventory", InventoryRow, "item_name", limit, after, before
+        )
+
+    def iter_inventory(self, chunk_size: int = 500) -> Iterator[List[InventoryRow]]:
+        """Yield all inventory items ordered by item name in chunks"""
+        return self._iter_chunks("inventory", InventoryRow, "item_name", chunk_size)
+
+    def search_inventory(self, query: str, limit: int = 50) -> List[InventoryRow]:
+        """Get inventory items whose name or description contains ``query``"""
+        pattern = like_pattern(query.strip())
+        try:
+            with self.pool.connection() as connection:
+                return self._rows(
+                    connection,
+                    InventoryRow,
+                    """
+                    SELECT * FROM inventory
+                    WHERE item_name LIKE :pattern ESCAPE '\\'
+                        OR description LIKE :pattern ESCAPE '\\'
+                    ORDER BY item_name, id
+                    LIMIT :limit
+                """,
+                    {"pattern": pattern, "limit": limit},
+                )
+
+        except sqlite3.Error as e:
+            print(f"Error searching inventory: {e}")
+            return []
+
+    # Statistics
+    def get_dashboard_stats(self, month_year: Optional[str] = None) -> Dict[str, Any]:
+        """Get the dashboard counters and totals in a single query.
+
+        ``monthly_revenue`` sums fees recorded for ``month_year`` (YYYY-MM),
+        which defaults to the current month. Results are cached until one of
+        the tables they read is written through this instance.
+        """
+        if month_year is None:
+            month_year = datetime.now().strftime("%Y-%m")
+
+        try:
+            return dict(
+                self.stats_cache.get_or_compute(
+                    ("dashboard", month_year),
+                    ("students", "financial_records", "inventory", "users"),
+                    lambda: self._query_dashboard_stats(month_year),
+                )
+            )
+        except sqlite3.Error as e:
+            print(f"Error loading dashboard stats: {e}")
+            return {
+                "student_count": 0,
+                "monthly_revenue": 0,
+                "inventory_count": 0,
+                "inventory_value": 0,
+                "user_count": 0,
+            }
+
+    def _query_dashboard_stats(self, month_year: str) -> Dict[str, Any]:
+        with self.pool.connection() as connection:
+            row = connection.execute(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM students) AS student_count,
+                    (SELECT COALESCE(SUM(monthly_fee + COALESCE(bus_fee, 0)), 0)
+                        FROM financial_records
+                        WHERE month_year = ?) AS monthly_revenue,
+                    (SELECT COUNT(*) FROM inventory) AS inventory_count,
+                    (SELECT COALESCE(SUM(quantity * purchase_price), 0)
+                        FROM inventory) AS inventory_value,
+                    (SELECT COUNT(*) FROM users) AS user_count
+            """,
+                (month_year,),
+            ).fetchone()
+        return dict(row)
+
+    def stats_cache_info(self) -> Dict[str, Any]:
+        """Hit/miss counters of the statistics cache"""
+        return self.stats_cache.info()
+
+    # Pagination helpers
+    def _fetch_page(
+        self,
+        table: str,
+        model: type,
+        sort_column: str,
+        limit: int,
+        after: Optional[Cursor] = None,
+        before: Optional[Cursor] = None,
+    ) -> Page:
+        """Keyset-paginate ``table`` on ``(sort_column, id)`` into ``model`` rows.
+
+        Only one of ``after`` and ``before`` may be given. One extra row is
+        fetched to tell whether another page exists in the scan direction.
+        ``table`` and ``sort_column`` come from the callers above, never from
+        user input.
+        """
+        if after is not None and before is not None:
+            raise ValueError("Pass either 'after' or 'before', not both")
+
+        query = f"SELECT * FROM {table}"
+        params: List[Any] = []
+        if before is not None:
+            query += f" WHERE ({sort_column}, id) < (?, ?)"
+            query += f" ORDER BY {sort_column} DESC, id DESC LIMIT ?"
+            params.extend(before)
+        else:
+            if after is not None:
+                query += f" WHERE ({sort_column}, id) > (?, ?)"
+                params.extend(after)
+            query += f" ORDER BY {sort_column}, id LIMIT ?"
+        params.append(limit + 1)
+
+        try:
+            with self.pool.connection() as connection:
+                rows = self._rows(connection, model, query, params)
+        except sqlite3.Error:
+            return Page([], None, None)
+
+        has_more = len(rows) > limit
+        del rows[limit:]
+        if before is not None:
+            rows.reverse()
+        if not rows:
+            return Page([], None, None)
+
+        first = (getattr(rows[0], sort_column), rows[0].id)
+        last = (getattr(rows[-1], sort_column), rows[-1].id)
+        if before is not None:
+            return Page(rows, last, first if has_more else None)
+        return Page(rows, last if has_more else None, first if after else None)
+
+    def _iter_chunks(
+        self, table: str, model: type, sort_column: str, chunk_size: int
+    ) -> Iterator[List[Any]]:
+        """Stream ``table`` page by page so only one chunk is held in memory"""
+        cursor = None
+        while True:
+            page = self._fetch_page(
+                table, model, sort_column, chunk_size, after=cursor
+            )
+            if page.rows:
+                yield page.rows
+            if page.next_cursor is None:
+                return
+            cursor = page.next_cursor
+
+
+# Threads of async_db (see async_database.py)
+ASYNC_DB_WORKERS = 4
 
-# Global database instance
-db = KindergartenDatabase()
+# Global database instance; one connection for each async_db worker, each
+# password hashing worker and the event loop, so none of them waits for one
+db = KindergartenDatabase(pool_size=ASYNC_DB_WORKERS + HASHING_WORKERS + 1)
 
 
 def initialize_database():
-    """Initialize the database and migrate existing data"""
-    if db.initialize_database():
-        db.migrate_users_from_json()
-        return True
-    return False
+    """Create the tables and apply pending migrations"""
+    return db.initialize_database()
 
 
 if __name__ == "__main__":
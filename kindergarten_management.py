@@ -1,13 +1,17 @@
-import hashlib
-import json
-import os
+import math
 import secrets
 
 # Local imports
 from database import db
+from login_throttle import LoginThrottle
+from password_hashing import PasswordHasher
+from session_store import SessionStore
+from user_cache import UserCache
 
 
 class User:
+    __slots__ = ("username", "hashed_password", "role")
+
     def __init__(self, username, hashed_password, role="admin"):
         self.username = username
         self.hashed_password = hashed_password
@@ -15,6 +19,8 @@ class User:
 
 
 class Student:
+    __slots__ = ("name", "age", "birth_date", "phone", "dad_job", "mum_job")
+
     def __init__(self, name, age, birth_date, phone, dad_job, mum_job):
         self.name = name
         self.age = age
@@ -25,12 +31,16 @@ class Student:
 
 
 class Parent:
+    __slots__ = ("name", "job")
+
     def __init__(self, name, job):
         self.name = name
         self.job = job
 
 
 class FinancialRecord:
+    __slots__ = ("student_name", "monthly_fee", "bus_fee")
+
     def __init__(self, student_name, monthly_fee, bus_fee):
         self.student_name = student_name
         self.monthly_fee = monthly_fee
@@ -38,6 +48,8 @@ class FinancialRecord:
 
 
 class InventoryItem:
+    __slots__ = ("item_name", "quantity", "purchase_price")
+
     def __init__(self, item_name, quantity, purchase_price):
         self.item_name = item_name
         self.quantity = quantity
@@ -46,95 +58,199 @@ class InventoryItem:
 
 # Authentication utilities
 class AuthManager:
-    def __init__(self):
-        self.users = self.load_users()
+    def __init__(self, hasher=None):
+        # Hashing and verifying are deliberately slow; UI handlers call the
+        # methods below through run_hashing so they never block the page
+        self.hasher = hasher or PasswordHasher()
+        self._unknown_user_hash = None
+        # Lookups are answered from memory and kept in step with the
+        # database, including users added by other app processes
+        self.user_cache = UserCache(db)
+        # Failed logins are counted per username and client; locked out
+        # attempts are refused before any hashing
+        self.throttle = LoginThrottle(db)
+        # A login starts a session behind a signed token; privileged actions
+        # check the role held by the session instead of re-hashing passwords
+        self.sessions = SessionStore()
 
-    def hash_password(self, password, salt=None):
-        """Hash password with salt using SHA256"""
-        if salt is None:
-            salt = secrets.token_hex(16)
-        salted_password = salt + password
-        hashed = hashlib.sha256(salted_password.encode()).hexdigest()
-        return f"{salt}${hashed}"
+    @property
+    def users(self):
+        """All users by username"""
+        return self.load_users()
+
+    def hash_password(self, password):
+        """Hash password with the configured key-derivation function"""
+        return self.hasher.hash(password)
 
     def verify_password(self, stored_password, provided_password):
         """Verify provided password against stored hash"""
-        try:
-            salt, stored_hash = stored_password.split("$")
-            salted_password = salt + provided_password
-            provided_hash = hashlib.sha256(salted_password.encode()).hexdigest()
-            return provided_hash == stored_hash
-        except:
-            return False
+        return self.hasher.verify(stored_password, provided_password)
+
+    def rehash_if_needed(self, username, stored_password, password):
+        """Upgrade a verified password stored with an old or weaker hash"""
+        if not self.hasher.needs_rehash(stored_password):
+            return stored_password
+        hashed_password = self.hash_password(password)
+        if not db.update_password(username, hashed_password):
+            return stored_password
+        self.user_cache.invalidate()
+        return hashed_password
 
     def load_users(self):
-        """Load users from database"""
-        users_data = db.get_all_users()
+        """Load users from the user cache"""
+        users_data = self.user_cache.all()
         return {
-            user_data["username"]: User(
-                user_data["username"], user_data["hashed_password"], user_data["role"]
+            user_data.username: User(
+                user_data.username, user_data.hashed_password, user_data.role
             )
             for user_data in users_data
         }
 
     def create_user(self, username, password, role="admin"):
         """Create a new user in database"""
-        if username in self.users:
+        if self.user_cache.get(username) is not None:
             return False, "اسم المستخدم موجود مسبقاً"
 
         hashed_password = self.hash_password(password)
         success = db.create_user(username, hashed_password, role)
         if success:
-            self.users[username] = User(username, hashed_password, role)
+            self.user_cache.invalidate()
             return True, "تم إنشاء المستخدم بنجاح"
         return False, "فشل في إنشاء المستخدم"
 
-    def authenticate(self, username, password):
-        """Authenticate user credentials"""
-        user_data = db.get_user(username)
-        if user_data and self.verify_password(user_data["hashed_password"], password):
-            user = User(
-                user_data["username"], user_data["hashed_password"], user_data["role"]
+    def set_role(self, username, role):
+        """Change a user's role and end the user's sessions"""
+        success = db.set_role(username, role)
+        if success:
+            self.user_cache.invalidate()
+            # Sessions carry the role they started with
+            self.sessions.revoke_user(username)
+            return True, "تم تغيير صلاحية المستخدم بنجاح"
+        return False, "اسم المستخدم غير موجود"
+
+    def upsert_users(self, users):
+        """Create or update (username, hashed_password, role) users in bulk"""
+        users = list(users)
+        count = db.upsert_users(users)
+        if count:
+            self.user_cache.invalidate()
+            # Existing users may have a new password or role
+            for username, _, _ in users:
+                self.sessions.revoke_user(username)
+        return count
+
+    def authenticate(self, username, password, client=None):
+        """Authenticate user credentials, optionally per client (IP/session)"""
+        locked_for = self.throttle.locked_for(username, client)
+        if locked_for:
+            minutes = math.ceil(locked_for / 60)
+            return False, f"محاولات دخول كثيرة، حاول مرة أخرى بعد {minutes} دقيقة"
+
+        user_data = self.user_cache.get(username)
+        if user_data is None:
+            # Spend the same time as for a wrong password so response times
+            # do not reveal which usernames exist
+            if self._unknown_user_hash is None:
+                self._unknown_user_hash = self.hash_password(secrets.token_hex(16))
+            self.verify_password(self._unknown_user_hash, password)
+        elif self.verify_password(user_data.hashed_password, password):
+            hashed_password = self.rehash_if_needed(
+                username, user_data.hashed_password, password
             )
+            user = User(user_data.username, hashed_password, user_data.role)
+            self.throttle.record_success(username, client)
             return True, user
+        self.throttle.record_failure(username, client)
         return False, "اسم المستخدم أو كلمة المرور غير صحيحة"
 
+    def start_session(self, user):
+        """Start a session for an authenticated user and return its token"""
+        return self.sessions.create(user.username, user.role)
+
+    def _session_user(self, token):
+        """Return the user row of a live session token, or None.
+
+        A session whose user was deleted, or whose role changed, since
+        logging in is revoked instead of acting on the role it started with.
+        """
+        session = self.sessions.get(token)
+        if session is None:
+            return None
+        user_data = self.user_cache.get(session.username)
+        if user_data is None or user_data.role != session.role:
+            self.sessions.revoke(token)
+            return None
+        return user_data
+
+    def resume_session(self, token):
+        """Return the user of a live session token, or None"""
+        user_data = self._session_user(token)
+        if user_data is None:
+            return None
+        return User(user_data.username, user_data.hashed_password, user_data.role)
+
+    def is_admin_session(self, token):
+        """Whether a token belongs to a live session of an existing admin"""
+        user_data = self._session_user(token)
+        return user_data is not None and user_data.role == "admin"
+
+    def end_session(self, token):
+        """Log out the session of a token"""
+        self.sessions.revoke(token)
+
     def initialize_default_admin(self):
         """Create default admin user if no users exist"""
-        users = db.get_all_users()
+        users = self.user_cache.all()
         if not users:
             success, message = self.create_user("admin", "admin123", "admin")
             return success, message
         return True, "المستخدمون موجودون بالفعل"
 
-    def reset_password(self, username, new_password, admin_username, admin_password):
-        """Reset user password with admin verification"""
-        # Verify admin credentials first
-        admin_auth, admin_msg = self.authenticate(admin_username, admin_password)
-        if not admin_auth:
-            return False, "كلمة مرور المدير غير صحيحة"
+    def reset_password(
+        self,
+        username,
+        new_password,
+        admin_username=None,
+        admin_password=None,
+        session=None,
+    ):
+        """Reset user password with an admin session or admin credentials"""
+        if session is not None:
+            if not self.is_admin_session(session):
+                return False, "ليست لديك صلاحية لإعادة تعيين كلمات المرور"
+        else:
+            # Verify admin credentials first
+            admin_auth, admin_msg = self.authenticate(admin_username, admin_password)
+            if not admin_auth:
+                return False, "كلمة مرور المدير غير صحيحة"
 
-        # Check if admin user has admin role
-        admin_user = self.users.get(admin_username)
-        if not admin_user or admin_user.role != "admin":
-            return False, "ليست لديك صلاحية لإعادة تعيين كلمات المرور"
+            # Check if admin user has admin role
+            admin_user = self.user_cache.get(admin_username)
+            if not admin_user or admin_user.role != "admin":
+                return False, "ليست لديك صلاحية لإعادة تعيين كلمات المرور"
 
         # Check if target user exists
-        if username not in self.users:
+        target_user = self.user_cache.get(username)
+        if target_user is None:
             return False, "اسم المستخدم غير موجود"
 
         # Reset the password in database
         hashed_password = self.hash_password(new_password)
-        # For now, we'll create a new user with updated password
-        # In a real implementation, we'd have an update_user method in the database
-        success = db.create_user(username, hashed_password, self.users[username].role)
+        success = db.update_password(username, hashed_password)
         if success:
-            self.users[username].hashed_password = hashed_password
+            self.user_cache.invalidate()
+            # Log the user out everywhere with the old password
+            self.sessions.revoke_user(username)
             return True, "تم إعادة تعيين كلمة المرور بنجاح"
         return False, "فشل في إعادة تعيين كلمة المرور"
 
-    def verify_admin(self, username, password):
-        """Verify if user is an admin with correct credentials"""
+    def verify_admin(self, username=None, password=None, session=None):
+        """Verify an admin session, or an admin's credentials"""
+        if session is not None:
+            if not self.is_admin_session(session):
+                return False, "ليست لديك صلاحية المدير"
+            return True, "تم التحقق من هوية المدير بنجاح"
+
         auth_result, user_or_msg = self.authenticate(username, password)
         if not auth_result:
             return False, "اسم المستخدم أو كلمة المرور غير صحيحة"
@@ -0,0 +1,161 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Failed logins allowed per username and per client within WINDOW_SECONDS
+USER_MAX_FAILURES = 5
+CLIENT_MAX_FAILURES = 20
+WINDOW_SECONDS = 15 * 60
+
+# How long a username or client is locked out after too many failures
+LOCKOUT_SECONDS = 15 * 60
+
+# Counters kept in memory; the least recently used are evicted beyond this
+MAX_TRACKED_KEYS = 10_000
+
+# Expired counters and lockouts are swept at most this often
+SWEEP_INTERVAL_SECONDS = 60
+
+
+class LoginThrottle:
+    """Rate-limit failed logins per username and per client.
+
+    Failures are counted with sliding-window counters: each key keeps the
+    count of the current and the previous fixed window, and the previous
+    count is weighted by how much of it still overlaps the sliding window.
+    That costs two integers per key instead of a timestamp per attempt.
+    Counters live in a bounded LRU, so a flood of random usernames cannot
+    grow memory without limit, and expired entries are swept periodically.
+
+    A key that reaches its limit is locked out for ``lockout_seconds``.
+    Lockouts are written to the ``login_lockouts`` table so they survive a
+    restart. ``locked_for`` only reads memory and is meant to run before
+    any password hashing, so rejected attempts cost almost nothing.
+    """
+
+    def __init__(
+        self,
+        database=None,
+        user_max_failures: int = USER_MAX_FAILURES,
+        client_max_failures: int = CLIENT_MAX_FAILURES,
+        window_seconds: float = WINDOW_SECONDS,
+        lockout_seconds: float = LOCKOUT_SECONDS,
+        max_keys: int = MAX_TRACKED_KEYS,
+        clock=time.time,
+    ):
+        self.database = database
+        self.limits = {"user": user_max_failures, "client": client_max_failures}
+        self.window = window_seconds
+        self.lockout_seconds = lockout_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [window start, failures in this window, failures in previous]
+        self.counters: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.lockouts: Dict[str, float] = {}  # key -> locked until
+        self.swept_at = clock()
+        self.lock = threading.Lock()
+        # Persisted lockouts are read on first use, after migrations have run
+        self.loaded = database is None
+
+    @staticmethod
+    def keys(username: str, client: Optional[str]) -> List[Tuple[str, str]]:
+        keys = [("user", f"user:{username.strip().lower()}")]
+        if client:
+            keys.append(("client", f"client:{client}"))
+        return keys
+
+    def locked_for(self, username: str, client: Optional[str] = None) -> float:
+        """Seconds until the username or client may try again (0 if allowed)"""
+        now = self.clock()
+        with self.lock:
+            if not self.loaded:
+                self.lockouts.update(self.database.get_login_lockouts(now))
+                self.loaded = True
+            self._sweep(now)
+            remaining = 0.0
+            for _, key in self.keys(username, client):
+                until = self.lockouts.get(key)
+                if until is not None and until > now:
+                    remaining = max(remaining, until - now)
+            return remaining
+
+    def record_failure(self, username: str, client: Optional[str] = None) -> float:
+        """Count a failed login; returns the lockout started by it, if any"""
+        now = self.clock()
+        locked = []
+        with self.lock:
+            for kind, key in self.keys(username, client):
+                if self._increment(key, now) >= self.limits[kind]:
+                    until = now + self.lockout_seconds
+                    self.lockouts[key] = until
+                    self.counters.pop(key, None)
+                    locked.append((key, until))
+        if locked and self.database is not None:
+            self.database.add_login_lockouts(locked)
+        return self.lockout_seconds if locked else 0.0
+
+    def record_success(self, username: str, client: Optional[str] = None):
+        """Forget the failures of a username after a successful login"""
+        with self.lock:
+            self.counters.pop(self.keys(username, None)[0][1], None)
+
+    def failures(self, key: str) -> float:
+        """Estimated failures of a key within the sliding window"""
+        with self.lock:
+            counter = self.counters.get(key)
+            return self._estimate(counter, self.clock()) if counter else 0.0
+
+    def _roll(self, counter: List[float], now: float):
+        """Advance a counter to the window containing ``now``"""
+        elapsed_windows = math.floor((now - counter[0]) / self.window)
+        if elapsed_windows >= 1:
+            counter[2] = counter[1] if elapsed_windows == 1 else 0
+            counter[1] = 0
+            counter[0] += elapsed_windows * self.window
+
+    def _estimate(self, counter: List[float], now: float) -> float:
+        self._roll(counter, now)
+        overlap = 1 - (now - counter[0]) / self.window
+        return counter[1] + counter[2] * overlap
+
+    def _increment(self, key: str, now: float) -> float:
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = self.counters[key] = [now, 0, 0]
+            if len(self.counters) > self.max_keys:
+                self.counters.popitem(last=False)
+        else:
+            self.counters.move_to_end(key)
+            self._roll(counter, now)
+        counter[1] += 1
+        return self._estimate(counter, now)
+
+    def _sweep(self, now: float):
+        """Drop counters with no failures left in the window and old lockouts"""
+        if now - self.swept_at < SWEEP_INTERVAL_SECONDS:
+            return
+        self.swept_at = now
+        expired = [key for key, until in self.lockouts.items() if until <= now]
+        for key in expired:
+            del self.lockouts[key]
+        stale = [
+            key
+            for key, counter in self.counters.items()
+            if now - counter[0] >= 2 * self.window
+        ]
+        for key in stale:
+            del self.counters[key]
+        if expired and self.database is not None:
+            self.database.delete_expired_login_lockouts(now)
+
+    def clear(self, keys: Iterable[str] = ()):
+        """Lift lockouts and counters, for all keys when none are given"""
+        with self.lock:
+            keys = list(keys) or list(self.lockouts) + list(self.counters)
+            for key in keys:
+                self.lockouts.pop(key, None)
+                self.counters.pop(key, None)
+        if self.database is not None:
+            self.database.delete_login_lockouts(keys)
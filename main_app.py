@@ -4,8 +4,13 @@ import flet as ft
 # Removed MaterialState import
 
 # Local imports
-from view.auth_ui import set_show_main_system_callback, show_login_page
-from database import db
+from view.auth_ui import (
+    end_session,
+    resume_session,
+    set_show_main_system_callback,
+    show_login_page,
+)
+from database import db, initialize_database
 from view.financial_ui import create_financial_tab
 from view.inventory_ui import create_inventory_tab
 from kindergarten_management import auth_manager, FinancialRecord, InventoryItem
@@ -13,12 +18,16 @@ from view.reports_ui import create_reports_tab
 from view.student_ui import create_student_registration_tab
 from view.dashboard_ui import show_main_system
 
+# Create tables and apply pending schema migrations
+initialize_database()
+
 # Initialize default admin user
 auth_manager.initialize_default_admin()
 
 
 def back_to_login(page: ft.Page):
-    """Return to login page"""
+    """Log out and return to login page"""
+    end_session(page)
     page.clean()
     show_login_page(page)
 
@@ -51,8 +60,12 @@ def main(page: ft.Page):
     # Set the callback for showing main system
     set_show_main_system_callback(show_main_system)
 
-    # Show login page initially
-    show_login_page(page)
+    # Resume the session saved by a reconnecting client, otherwise log in
+    current_user = resume_session(page)
+    if current_user:
+        show_main_system(page, current_user)
+    else:
+        show_login_page(page)
 
 
 if __name__ == "__main__":
@@ -570,12 +570,12 @@ def main(page: ft.Page):
                 student_data_table.rows.append(
                     ft.DataRow(
                         cells=[
-                            ft.DataCell(ft.Text(student["name"])),
-                            ft.DataCell(ft.Text(str(student["age"]))),
-                            ft.DataCell(ft.Text(student["birth_date"] or "-")),
-                            ft.DataCell(ft.Text(student["phone"] or "-")),
-                            ft.DataCell(ft.Text(student["dad_job"] or "-")),
-                            ft.DataCell(ft.Text(student["mum_job"] or "-")),
+                            ft.DataCell(ft.Text(student.name)),
+                            ft.DataCell(ft.Text(str(student.age))),
+                            ft.DataCell(ft.Text(str(student.birth_date or "-"))),
+                            ft.DataCell(ft.Text(student.phone or "-")),
+                            ft.DataCell(ft.Text(student.dad_job or "-")),
+                            ft.DataCell(ft.Text(student.mum_job or "-")),
                         ]
                     )
                 )
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""Versioned schema migrations for the kindergarten database.
+
+Each migration has a number and is applied at most once. The numbers that
+have been applied are recorded in the ``schema_version`` table, so running
+the migrations at every startup only does work after an upgrade.
+"""
+import json
+import os
+import sqlite3
+import sys
+from typing import Callable, List, NamedTuple
+
+# Local imports
+from text_search import normalize_sql
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register a function as the migration with the given version number"""
+
+    def register(func: Callable[[sqlite3.Connection], None]):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version: {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+
+    return register
+
+
+def _column_names(connection: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+
+
+@migration(1, "Add photo_path column to students")
+def add_student_photo_path(connection: sqlite3.Connection):
+    # Databases created before photo uploads were added lack this column
+    if "photo_path" not in _column_names(connection, "students"):
+        connection.execute("ALTER TABLE students ADD COLUMN photo_path TEXT")
+
+
+@migration(2, "Add secondary indexes for lookups and ordering")
+def add_lookup_indexes(connection: sqlite3.Connection):
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_financial_records_student_id "
+        "ON financial_records (student_id)"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_financial_records_month_year "
+        "ON financial_records (month_year)"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_parents_student_id ON parents (student_id)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_students_name ON students (name)")
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_inventory_item_name ON inventory (item_name)"
+    )
+
+
+@migration(3, "Add photos table for photos stored in the database")
+def add_photos_table(connection: sqlite3.Connection):
+    # Originals and thumbnails are keyed by their content-addressed name; the
+    # BLOB column comes last so other columns are read without touching it
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS photos (
+            name TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            data BLOB NOT NULL
+        )
+    """
+    )
+
+
+# Student columns mirrored into the full-text index
+STUDENT_SEARCH_COLUMNS = ("name", "phone", "dad_job", "mum_job", "problem")
+
+
+@migration(4, "Add full-text search index over students")
+def add_student_search(connection: sqlite3.Connection):
+    columns = ", ".join(STUDENT_SEARCH_COLUMNS)
+
+    def normalized(prefix: str) -> str:
+        return ", ".join(
+            normalize_sql(f"{prefix}{column}") for column in STUDENT_SEARCH_COLUMNS
+        )
+
+    # The index keeps its own normalized copy of the text, with student ids
+    # as rowids; prefix indexes make search-as-you-type queries cheap
+    connection.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            {columns},
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '1 2 3'
+        )
+    """
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students
+        BEGIN
+            INSERT INTO students_fts (rowid, {columns})
+            VALUES (new.id, {normalized("new.")});
+        END
+    """
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS students_fts_update
+        AFTER UPDATE OF {columns} ON students
+        BEGIN
+            DELETE FROM students_fts WHERE rowid = old.id;
+            INSERT INTO students_fts (rowid, {columns})
+            VALUES (new.id, {normalized("new.")});
+        END
+    """
+    )
+    connection.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students
+        BEGIN
+            DELETE FROM students_fts WHERE rowid = old.id;
+        END
+    """
+    )
+    # Index the students that already exist
+    connection.execute("DELETE FROM students_fts")
+    connection.execute(
+        f"""
+        INSERT INTO students_fts (rowid, {columns})
+        SELECT id, {normalized("")} FROM students
+    """
+    )
+
+
+@migration(5, "Track user changes with version stamps")
+def add_user_versions(connection: sqlite3.Connection):
+    # table_versions.version grows on every write to a tracked table and each
+    # user row records the version of its last change, so a cache can fetch
+    # just the rows changed since it last looked, whichever process wrote them
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """
+    )
+    connection.execute(
+        "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES ('users', 0)"
+    )
+    if "version" not in _column_names(connection, "users"):
+        connection.execute(
+            "ALTER TABLE users ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+        )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_version ON users (version)"
+    )
+
+    bump = "UPDATE table_versions SET version = version + 1 WHERE table_name = 'users'"
+    stamp = (
+        "UPDATE users SET version = (SELECT version FROM table_versions "
+        "WHERE table_name = 'users') WHERE id = new.id"
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users
+        BEGIN
+            {bump};
+            {stamp};
+        END
+    """
+    )
+    # Limited to the data columns so stamping the version does not re-fire it
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS users_version_update
+        AFTER UPDATE OF username, hashed_password, role ON users
+        BEGIN
+            {bump};
+            {stamp};
+        END
+    """
+    )
+    connection.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users
+        BEGIN
+            {bump};
+        END
+    """
+    )
+
+
+@migration(6, "Add login_lockouts table for persisted login lockouts")
+def add_login_lockouts(connection: sqlite3.Connection):
+    # One row per locked username ("user:<name>") or client ("client:<id>");
+    # locked_until is a Unix timestamp so expiry checks need no date parsing
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS login_lockouts (
+            key TEXT PRIMARY KEY,
+            locked_until REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """
+    )
+
+
+# Users of the JSON-file era, read from next to the database file
+LEGACY_USERS_FILE = "users.json"
+
+
+@migration(7, "Import legacy users from users.json into an empty users table")
+def import_legacy_users(connection: sqlite3.Connection):
+    # Runs once; a database that already has users keeps them as they are,
+    # so accounts deleted since are not brought back
+    if connection.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+        return
+    database_file = connection.execute("PRAGMA database_list").fetchone()[2]
+    path = os.path.join(os.path.dirname(database_file), LEGACY_USERS_FILE)
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            users = [
+                (user_data["username"], user_data["hashed_password"], user_data["role"])
+                for user_data in json.load(f)
+            ]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Skipping {path}: {e}")
+        return
+    connection.executemany(
+        """
+        INSERT OR IGNORE INTO users (username, hashed_password, role)
+        VALUES (?, ?, ?)
+    """,
+        users,
+    )
+
+
+def current_version(connection: sqlite3.Connection) -> int:
+    """Return the highest applied migration version (0 for a fresh database)"""
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """
+    )
+    row = connection.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(connection: sqlite3.Connection) -> int:
+    """Apply pending migrations in order and return how many were applied.
+
+    Every migration runs in its own ``BEGIN IMMEDIATE`` transaction together
+    with its ``schema_version`` row, so a failed migration leaves the schema
+    untouched and two processes starting at once cannot apply it twice.
+    """
+    isolation_level = connection.isolation_level
+    connection.isolation_level = None  # manage transactions explicitly
+    applied = 0
+    try:
+        current_version(connection)
+        for item in MIGRATIONS:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if item.version <= current_version(connection):
+                    connection.execute("ROLLBACK")
+                    continue
+                item.apply(connection)
+                connection.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (item.version, item.description),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            print(f"Applied migration {item.version}: {item.description}")
+            applied += 1
+    finally:
+        connection.isolation_level = isolation_level
+    return applied
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "kindergarten.db"
+    conn = sqlite3.connect(db_path)
+    try:
+        count = run_migrations(conn)
+        print(f"Schema version {current_version(conn)} ({count} migrations applied)")
+    except sqlite3.Error as e:
+        print(f"Migration error: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Password hashing with a tunable key-derivation function.
+
+Hashes are self-describing strings that carry their own parameters, so the
+cost can be raised later without invalidating stored passwords::
+
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+
+Salt and hash are URL-safe base64 without padding. Hashes written by older
+versions (``<hex salt>$<sha256 hex>``) still verify; ``needs_rehash`` reports
+them, and any hash made with weaker parameters, so they can be replaced at
+the next successful login.
+
+Usage:
+    python password_hashing.py benchmark [target_ms]   # pick a cost
+"""
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+PBKDF2_ALGORITHM = "pbkdf2_sha256"
+SCRYPT_ALGORITHM = "scrypt"
+LEGACY_ALGORITHM = "sha256"
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read a positive integer setting, falling back to ``default``"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        print(f"Warning: ignoring {name}={value!r}, using {default}")
+        return default
+    return number
+
+
+# PBKDF2 iterations for new hashes; override with the environment variable
+# after running the benchmark on the server
+PBKDF2_ITERATIONS = _env_int("KINDERGARTEN_PBKDF2_ITERATIONS", 600_000)
+
+# scrypt cost parameters (memory use is 128 * n * r bytes)
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+# Successful verifications remembered per process
+VERIFY_CACHE_SIZE = 256
+
+# Login latency the benchmark picks a cost for
+TARGET_MILLISECONDS = 250
+
+# Threads that run password checks, one per core (the KDFs release the GIL)
+# up to 4 so simultaneous logins hash in parallel. They are kept apart from
+# the database workers (async_db), so a burst of logins queues behind itself
+# instead of stalling every session's queries; the global database's
+# connection pool is sized for both.
+HASHING_WORKERS = _env_int("KINDERGARTEN_HASHING_WORKERS", min(4, os.cpu_count() or 1))
+
+_hashing_executor = ThreadPoolExecutor(
+    max_workers=HASHING_WORKERS, thread_name_prefix="kindergarten-hash"
+)
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def identify(encoded: str) -> Optional[str]:
+    """Return the algorithm a stored hash was made with, or None"""
+    parts = encoded.split("$")
+    if parts[0] == PBKDF2_ALGORITHM and len(parts) == 4:
+        return PBKDF2_ALGORITHM
+    if parts[0] == SCRYPT_ALGORITHM and len(parts) == 6:
+        return SCRYPT_ALGORITHM
+    if len(parts) == 2:
+        return LEGACY_ALGORITHM
+    return None
+
+
+class PasswordHasher:
+    """Hash new passwords and verify stored ones.
+
+    New hashes use ``algorithm`` with the configured cost; hashes in any
+    supported format verify. Digests are compared with
+    ``hmac.compare_digest`` so timing does not reveal how much matched.
+
+    Verification deliberately takes tens to hundreds of milliseconds, so
+    callers on the Flet event loop should await it through ``run_hashing``.
+    Successful verifications are remembered in a small
+    LRU keyed by an HMAC of the stored hash and the password under a random
+    per-process key, so repeating the check for an already verified
+    password (admin confirmations) skips the key derivation. Failed
+    attempts are never cached and always pay the full cost.
+    """
+
+    def __init__(
+        self,
+        algorithm: str = PBKDF2_ALGORITHM,
+        iterations: int = PBKDF2_ITERATIONS,
+        scrypt_n: int = SCRYPT_N,
+        scrypt_r: int = SCRYPT_R,
+        scrypt_p: int = SCRYPT_P,
+        cache_size: int = VERIFY_CACHE_SIZE,
+    ):
+        if algorithm not in (PBKDF2_ALGORITHM, SCRYPT_ALGORITHM):
+            raise ValueError(f"Unsupported password hash algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.iterations = iterations
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self.cache_size = cache_size
+        self._cache_key = secrets.token_bytes(32)
+        self._verified: "OrderedDict[bytes, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hash(self, password: str) -> str:
+        """Hash a password with a fresh salt and the configured cost"""
+        salt = secrets.token_bytes(SALT_BYTES)
+        if self.algorithm == SCRYPT_ALGORITHM:
+            n, r, p = self.scrypt_n, self.scrypt_r, self.scrypt_p
+            digest = _scrypt(password, salt, n, r, p)
+            return f"{SCRYPT_ALGORITHM}${n}${r}${p}${_encode(salt)}${_encode(digest)}"
+        digest = _pbkdf2(password, salt, self.iterations)
+        return (
+            f"{PBKDF2_ALGORITHM}${self.iterations}${_encode(salt)}${_encode(digest)}"
+        )
+
+    def verify(self, encoded: str, password: str) -> bool:
+        """Check a password against a stored hash of any supported format"""
+        key = hmac.new(
+            self._cache_key,
+            f"{encoded}\0{password}".encode(),
+            hashlib.sha256,
+        ).digest()
+        with self._lock:
+            if key in self._verified:
+                self._verified.move_to_end(key)
+                return True
+
+        if not self._verify_uncached(encoded, password):
+            return False
+
+        with self._lock:
+            self._verified[key] = None
+            if len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+        return True
+
+    def _verify_uncached(self, encoded: str, password: str) -> bool:
+        try:
+            algorithm = identify(encoded)
+            parts = encoded.split("$")
+            if algorithm == PBKDF2_ALGORITHM:
+                _, iterations, salt, expected = parts
+                digest = _pbkdf2(password, _decode(salt), int(iterations))
+            elif algorithm == SCRYPT_ALGORITHM:
+                _, n, r, p, salt, expected = parts
+                digest = _scrypt(password, _decode(salt), int(n), int(r), int(p))
+            elif algorithm == LEGACY_ALGORITHM:
+                salt, expected_hex = parts
+                digest = hashlib.sha256((salt + password).encode()).digest()
+                expected = _encode(bytes.fromhex(expected_hex))
+            else:
+                return False
+            return hmac.compare_digest(_decode(expected), digest)
+        except (ValueError, TypeError):
+            # Malformed hash or parameters
+            return False
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """Whether a stored hash is weaker than what ``hash`` would produce"""
+        algorithm = identify(encoded)
+        if algorithm != self.algorithm:
+            return True
+        parts = encoded.split("$")
+        try:
+            if algorithm == PBKDF2_ALGORITHM:
+                return int(parts[1]) < self.iterations
+            n, r, p = (int(value) for value in parts[1:4])
+            return (n, r, p) != (self.scrypt_n, self.scrypt_r, self.scrypt_p)
+        except ValueError:
+            return True
+
+    def clear_cache(self):
+        """Forget remembered verifications"""
+        with self._lock:
+            self._verified.clear()
+
+
+async def run_hashing(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a call that hashes or verifies passwords on the hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hashing_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac(
+        "sha256", password.encode(), salt, iterations, dklen=HASH_BYTES
+    )
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode(),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r,
+        dklen=HASH_BYTES,
+    )
+
+
+def _time_ms(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def benchmark(target_ms: float = TARGET_MILLISECONDS) -> Dict[str, object]:
+    """Measure the KDFs and return the costs that fit ``target_ms``"""
+    salt = secrets.token_bytes(SALT_BYTES)
+
+    # PBKDF2 time grows linearly with the iteration count
+    sample = 100_000
+    sample_ms = min(_time_ms(lambda: _pbkdf2("x", salt, sample)) for _ in range(3))
+    iterations = int(target_ms / sample_ms * sample) // 10_000 * 10_000
+
+    # scrypt time doubles with n; take the largest n within the target
+    scrypt_n = 2**10
+    n = scrypt_n
+    timings = {}
+    while n <= 2**20:
+        elapsed = _time_ms(lambda: _scrypt("x", salt, n, SCRYPT_R, SCRYPT_P))
+        timings[n] = elapsed
+        if elapsed > target_ms:
+            break
+        scrypt_n = n
+        n *= 2
+
+    return {
+        "pbkdf2_ms_per_100k": sample_ms,
+        "pbkdf2_iterations": max(iterations, 10_000),
+        "scrypt_timings_ms": timings,
+        "scrypt_n": scrypt_n,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "benchmark":
+        print(__doc__)
+        sys.exit(1)
+    target = float(sys.argv[2]) if len(sys.argv) > 2 else TARGET_MILLISECONDS
+    result = benchmark(target)
+    print(f"Target verification time: {target:.0f} ms")
+    print(f"PBKDF2-SHA256: {result['pbkdf2_ms_per_100k']:.1f} ms per 100k iterations")
+    for n, elapsed in result["scrypt_timings_ms"].items():
+        print(f"scrypt n={n}: {elapsed:.1f} ms")
+    print()
+    print(f"Suggested: KINDERGARTEN_PBKDF2_ITERATIONS={result['pbkdf2_iterations']}")
+    print(f"or PasswordHasher('scrypt', scrypt_n={result['scrypt_n']})")
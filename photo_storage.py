@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+"""Student photo storage and thumbnails.
+
+Uploaded originals are content-addressed: the file is hashed while it is
+copied and stored under its SHA-256 digest, so uploading the same picture
+twice keeps one copy. Students reference photos through
+``students.photo_path``; photos no student references are removed by the
+``gc`` command.
+
+Two stores implement the same interface:
+
+- ``FilePhotoStore`` (default) keeps files as ``ab/cd/<sha256>.<ext>``
+  under ``student_photos``, so no directory grows beyond a few hundred
+  entries. References are plain relative paths.
+- ``BlobPhotoStore`` keeps photos as BLOBs in the ``photos`` table of the
+  database, so they travel with backups of ``kindergarten.db`` and do not
+  depend on the working directory. References look like ``db:<name>``.
+  Reads stream through ``sqlite3.Blob`` in chunks.
+
+Set ``KINDERGARTEN_PHOTO_STORE=database`` to store new uploads in the
+database. Existing references keep working with either setting.
+
+Fixed-size square thumbnails (``<name>_100.webp``, ``<name>_300.webp``) are
+stored next to each original and the UI shows those wherever it needs a
+small image, so it never ships or decodes the full-size file for a preview.
+
+Usage:
+    python photo_storage.py thumbnails   # create missing thumbnails
+    python photo_storage.py gc [--dry-run]   # remove unreferenced photos
+    python photo_storage.py benchmark <image> [repeat]   # compare stores
+"""
+import base64
+import hashlib
+import io
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it no thumbnails are made
+    Image = None
+
+PHOTOS_DIR = "student_photos"
+THUMBNAIL_SIZES = (100, 300)
+THUMBNAIL_EXTENSION = ".webp"
+THUMBNAIL_QUALITY = 80
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+# Bytes read per step while hashing and copying an upload
+COPY_CHUNK_SIZE = 1024 * 1024
+TEMPORARY_SUFFIX = ".tmp"
+
+# Bytes read per step from a BLOB; a multiple of 3 so chunks can be
+# base64-encoded separately
+BLOB_CHUNK_SIZE = 3 * 64 * 1024
+
+# Prefix of photo references that point into the photos table
+BLOB_PREFIX = "db:"
+
+# Files younger than this are never collected: an upload is stored before
+# the student row that references it is saved
+GC_GRACE_SECONDS = 60 * 60
+
+PHOTO_STORE_ENV = "KINDERGARTEN_PHOTO_STORE"
+
+
+def content_path(digest: str, extension: str, photos_dir: str = PHOTOS_DIR) -> str:
+    """Return where a photo with the given SHA-256 digest is stored"""
+    return os.path.join(photos_dir, digest[:2], digest[2:4], digest + extension)
+
+
+def _copy_to_temporary(
+    source_path: str,
+    directory: str,
+    progress: Optional[Callable[[float], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Optional[Tuple[str, str]]:
+    """Copy a file in chunks to a temporary file, hashing it on the way.
+
+    Returns the temporary path and the hex digest, or None when cancelled.
+    The caller owns (and must remove or rename) the temporary file.
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=TEMPORARY_SUFFIX)
+    try:
+        # The descriptor is wrapped first so it is closed if the source
+        # cannot be opened
+        with os.fdopen(handle, "wb") as target, open(source_path, "rb") as source:
+            total = os.fstat(source.fileno()).st_size
+            copied = 0
+            # One buffer is reused for every chunk; slices of the memoryview
+            # are passed on without copying
+            while count := source.readinto(buffer):
+                if cancel is not None and cancel.is_set():
+                    break
+                digest.update(view[:count])
+                target.write(view[:count])
+                copied += count
+                if progress:
+                    progress(copied / total)
+            else:
+                return temporary, digest.hexdigest()
+    except BaseException:
+        os.remove(temporary)
+        raise
+    # Cancelled
+    os.remove(temporary)
+    return None
+
+
+def store_photo(
+    source_path: str,
+    photos_dir: str = PHOTOS_DIR,
+    progress: Optional[Callable[[float], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Optional[str]:
+    """Copy an uploaded photo into content-addressed storage.
+
+    The file is copied in chunks to a temporary file and hashed on the way,
+    then renamed into place, so a stored path always names a complete
+    file. If the same content is already stored the copy is dropped and
+    the existing path is returned.
+
+    ``progress`` is called with the fraction copied after every chunk.
+    Setting ``cancel`` stops the copy; the temporary file is removed and
+    None is returned.
+    """
+    extension = os.path.splitext(source_path)[1].lower()
+    os.makedirs(photos_dir, exist_ok=True)
+    copied = _copy_to_temporary(source_path, photos_dir, progress, cancel)
+    if copied is None:
+        return None
+    temporary, digest = copied
+    try:
+        path = content_path(digest, extension, photos_dir)
+        if os.path.exists(path):
+            # Duplicate upload; refresh its age so gc keeps it until the
+            # new reference is saved
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temporary, path)
+        return path
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def thumbnail_path(photo_path: str, size: int) -> str:
+    """Return where the thumbnail of the given size for a photo is stored"""
+    stem = os.path.splitext(photo_path)[0]
+    return f"{stem}_{size}{THUMBNAIL_EXTENSION}"
+
+
+def is_thumbnail(path: str) -> bool:
+    stem, extension = os.path.splitext(path)
+    return extension == THUMBNAIL_EXTENSION and any(
+        stem.endswith(f"_{size}") for size in THUMBNAIL_SIZES
+    )
+
+
+def _thumbnail_owner(path: str) -> str:
+    """Return the stem of the original a thumbnail was made from"""
+    return os.path.splitext(path)[0].rsplit("_", 1)[0]
+
+
+def _render_thumbnails(source, sizes: Iterable[int]) -> Iterator[Tuple[int, bytes]]:
+    """Yield (size, WebP bytes) square thumbnails of an image path or file"""
+    sizes = sorted(sizes, reverse=True)
+    with Image.open(source) as image:
+        # Let the JPEG decoder downscale while decoding; much cheaper
+        # than decoding the full image and resizing afterwards
+        image.draft("RGB", (sizes[0] * 2, sizes[0] * 2))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size in sizes:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            output = io.BytesIO()
+            thumbnail.save(output, format="WEBP", quality=THUMBNAIL_QUALITY, method=4)
+            yield size, output.getvalue()
+
+
+def make_thumbnails(
+    photo_path: str, sizes: Iterable[int] = THUMBNAIL_SIZES
+) -> Dict[int, str]:
+    """Write square thumbnails for a photo and return them by size.
+
+    Returns an empty dict when Pillow is not installed or the file cannot
+    be decoded; callers then fall back to the original image.
+    """
+    if Image is None:
+        return {}
+
+    thumbnails = {}
+    try:
+        for size, data in _render_thumbnails(photo_path, sizes):
+            path = thumbnail_path(photo_path, size)
+            temporary = f"{path}.tmp"
+            try:
+                with open(temporary, "wb") as target:
+                    target.write(data)
+                os.replace(temporary, path)
+            finally:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+            thumbnails[size] = path
+    except (OSError, ValueError) as e:
+        print(f"Error creating thumbnails for {photo_path}: {e}")
+    return thumbnails
+
+
+def photo_src(photo_path: Optional[str], size: int = 100) -> Optional[str]:
+    """Return the image to show for a photo at the given size.
+
+    Prefers the matching thumbnail and falls back to the original when no
+    thumbnail exists (for example when Pillow is not installed).
+    """
+    if not photo_path:
+        return None
+    thumbnail = thumbnail_path(photo_path, size)
+    if os.path.exists(thumbnail):
+        return thumbnail
+    return photo_path
+
+
+def create_missing_thumbnails(photos_dir: str = PHOTOS_DIR) -> int:
+    """Create thumbnails for originals that do not have them yet"""
+    created = 0
+    for root, _, files in os.walk(photos_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            extension = os.path.splitext(name)[1].lower()
+            if extension not in IMAGE_EXTENSIONS or is_thumbnail(path):
+                continue
+            if all(
+                os.path.exists(thumbnail_path(path, size)) for size in THUMBNAIL_SIZES
+            ):
+                continue
+            if make_thumbnails(path):
+                created += 1
+    return created
+
+
+def collect_garbage(
+    referenced: Iterable[str],
+    photos_dir: str = PHOTOS_DIR,
+    grace_seconds: float = GC_GRACE_SECONDS,
+    dry_run: bool = False,
+) -> Tuple[int, int]:
+    """Remove photos no student references, with their thumbnails.
+
+    Leftover temporary files from interrupted uploads are removed too.
+    Returns the number of files removed and the bytes freed.
+    """
+    # Compare absolute paths so relative and absolute references both count;
+    # rows saved on Windows use backslashes
+    referenced = {
+        os.path.abspath(path.replace("\\", os.sep)) for path in referenced
+    }
+    referenced_stems = {os.path.splitext(path)[0] for path in referenced}
+    cutoff = time.time() - grace_seconds
+    removed = 0
+    freed = 0
+    for root, _, files in os.walk(photos_dir, topdown=False):
+        for name in files:
+            path = os.path.abspath(os.path.join(root, name))
+            if is_thumbnail(path):
+                # A thumbnail lives as long as its original is referenced
+                keep = _thumbnail_owner(path) in referenced_stems
+            else:
+                keep = path in referenced
+            if keep:
+                continue
+            stat = os.stat(path)
+            if stat.st_mtime > cutoff:
+                continue
+            if not dry_run:
+                os.remove(path)
+            removed += 1
+            freed += stat.st_size
+        # Drop shard directories emptied by the collection
+        if not dry_run and root != photos_dir and not os.listdir(root):
+            os.rmdir(root)
+    return removed, freed
+
+
+class FilePhotoStore:
+    """Photos stored as content-addressed files under a directory"""
+
+    def __init__(self, photos_dir: str = PHOTOS_DIR):
+        self.photos_dir = photos_dir
+
+    def store(
+        self,
+        source_path: str,
+        progress: Optional[Callable[[float], None]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[str]:
+        """Store an uploaded photo and return its reference"""
+        return store_photo(source_path, self.photos_dir, progress, cancel)
+
+    def make_thumbnails(
+        self, ref: str, sizes: Iterable[int] = THUMBNAIL_SIZES
+    ) -> Dict[int, str]:
+        """Create thumbnails for a stored photo and return them by size"""
+        return make_thumbnails(ref, sizes)
+
+    @contextmanager
+    def open(self, ref: str) -> Iterator[IO[bytes]]:
+        """Open a stored photo for reading"""
+        with open(ref, "rb") as photo:
+            yield photo
+
+    def image_source(self, ref: Optional[str], size: int = 100) -> Dict[str, str]:
+        """Return ``ft.Image`` arguments that show a photo at a given size"""
+        src = photo_src(ref, size)
+        return {"src": src} if src else {}
+
+    def thumbnail_source(self, ref: Optional[str], size: int = 100) -> Dict[str, str]:
+        """Like ``image_source`` but empty when the thumbnail is missing"""
+        if not ref:
+            return {}
+        thumbnail = thumbnail_path(ref, size)
+        return {"src": thumbnail} if os.path.exists(thumbnail) else {}
+
+    def collect_garbage(
+        self,
+        referenced: Iterable[str],
+        grace_seconds: float = GC_GRACE_SECONDS,
+        dry_run: bool = False,
+    ) -> Tuple[int, int]:
+        """Remove unreferenced photos; returns files removed and bytes freed"""
+        referenced = [ref for ref in referenced if not ref.startswith(BLOB_PREFIX)]
+        return collect_garbage(referenced, self.photos_dir, grace_seconds, dry_run)
+
+
+class BlobPhotoStore:
+    """Photos stored as BLOBs in the ``photos`` table of the database.
+
+    Uploads are first copied to a local temporary file, so the database
+    write lock is only held while a complete local file is written into
+    the BLOB, never during a slow copy from a network share.
+    """
+
+    def __init__(self, database):
+        self.database = database
+
+    @staticmethod
+    def _name(ref: str) -> str:
+        return ref[len(BLOB_PREFIX) :]
+
+    @staticmethod
+    def _rowid(connection: sqlite3.Connection, name: str) -> Optional[int]:
+        row = connection.execute(
+            "SELECT rowid FROM photos WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _write(connection: sqlite3.Connection, name: str, source: IO[bytes]):
+        """Insert a photo row and stream a file object into its BLOB"""
+        size = source.seek(0, io.SEEK_END)
+        source.seek(0)
+        cursor = connection.execute(
+            "INSERT OR REPLACE INTO photos (name, size, data) "
+            "VALUES (?, ?, zeroblob(?))",
+            (name, size, size),
+        )
+        buffer = bytearray(BLOB_CHUNK_SIZE)
+        view = memoryview(buffer)
+        with connection.blobopen("photos", "data", cursor.lastrowid) as blob:
+            while count := source.readinto(buffer):
+                blob.write(view[:count])
+
+    def store(
+        self,
+        source_path: str,
+        progress: Optional[Callable[[float], None]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Optional[str]:
+        """Store an uploaded photo and return its reference"""
+        extension = os.path.splitext(source_path)[1].lower()
+        copied = _copy_to_temporary(
+            source_path, tempfile.gettempdir(), progress, cancel
+        )
+        if copied is None:
+            return None
+        temporary, digest = copied
+        name = digest + extension
+        try:
+            with self.database.pool.transaction() as connection:
+                if self._rowid(connection, name) is None:
+                    with open(temporary, "rb") as source:
+                        self._write(connection, name, source)
+                else:
+                    # Duplicate upload; refresh its age so gc keeps it until
+                    # the new reference is saved
+                    connection.execute(
+                        "UPDATE photos SET created_at = CURRENT_TIMESTAMP "
+                        "WHERE name = ?",
+                        (name,),
+                    )
+        finally:
+            os.remove(temporary)
+        return BLOB_PREFIX + name
+
+    def make_thumbnails(
+        self, ref: str, sizes: Iterable[int] = THUMBNAIL_SIZES
+    ) -> Dict[int, str]:
+        """Create thumbnails for a stored photo and return them by size"""
+        if Image is None:
+            return {}
+
+        name = self._name(ref)
+        try:
+            # Pillow decodes straight from the BLOB handle
+            with self.open(ref) as photo:
+                rendered = list(_render_thumbnails(photo, sizes))
+            thumbnails = {}
+            with self.database.pool.transaction() as connection:
+                for size, data in rendered:
+                    thumbnail = thumbnail_path(name, size)
+                    self._write(connection, thumbnail, io.BytesIO(data))
+                    thumbnails[size] = BLOB_PREFIX + thumbnail
+            return thumbnails
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Error creating thumbnails for {ref}: {e}")
+            return {}
+
+    @contextmanager
+    def open(self, ref: str) -> Iterator[IO[bytes]]:
+        """Open a stored photo for reading through incremental BLOB I/O"""
+        with self.database.pool.connection() as connection:
+            rowid = self._rowid(connection, self._name(ref))
+            if rowid is None:
+                raise FileNotFoundError(ref)
+            with connection.blobopen("photos", "data", rowid, readonly=True) as blob:
+                yield blob
+
+    def iter_chunks(self, ref: str) -> Iterator[bytes]:
+        """Yield a stored photo in chunks without reading it whole"""
+        with self.open(ref) as blob:
+            while chunk := blob.read(BLOB_CHUNK_SIZE):
+                yield chunk
+
+    def _base64_source(self, ref: str) -> Dict[str, str]:
+        try:
+            encoded = "".join(
+                base64.b64encode(chunk).decode("ascii")
+                for chunk in self.iter_chunks(ref)
+            )
+        except (FileNotFoundError, sqlite3.Error):
+            return {}
+        return {"src_base64": encoded}
+
+    def image_source(self, ref: Optional[str], size: int = 100) -> Dict[str, str]:
+        """Return ``ft.Image`` arguments that show a photo at a given size.
+
+        Only thumbnails are sent; a photo without one gets {} (a placeholder)
+        rather than the whole original read into memory and base64 encoded.
+        """
+        return self.thumbnail_source(ref, size)
+
+    def thumbnail_source(self, ref: Optional[str], size: int = 100) -> Dict[str, str]:
+        """Return ``ft.Image`` arguments for a thumbnail, {} if it is missing"""
+        if not ref:
+            return {}
+        return self._base64_source(BLOB_PREFIX + thumbnail_path(self._name(ref), size))
+
+    def collect_garbage(
+        self,
+        referenced: Iterable[str],
+        grace_seconds: float = GC_GRACE_SECONDS,
+        dry_run: bool = False,
+    ) -> Tuple[int, int]:
+        """Remove unreferenced photos; returns rows removed and bytes freed"""
+        names = {
+            self._name(ref) for ref in referenced if ref.startswith(BLOB_PREFIX)
+        }
+        stems = {os.path.splitext(name)[0] for name in names}
+        with self.database.pool.transaction() as connection:
+            rows = connection.execute(
+                "SELECT name, size FROM photos WHERE created_at < datetime('now', ?)",
+                (f"-{int(grace_seconds)} seconds",),
+            ).fetchall()
+            orphans = [
+                (name, size)
+                for name, size in rows
+                if not (
+                    _thumbnail_owner(name) in stems
+                    if is_thumbnail(name)
+                    else name in names
+                )
+            ]
+            if not dry_run:
+                connection.executemany(
+                    "DELETE FROM photos WHERE name = ?",
+                    [(name,) for name, _ in orphans],
+                )
+        return len(orphans), sum(size for _, size in orphans)
+
+
+_stores: Dict[str, object] = {}
+
+
+def _default_database():
+    # Local imports
+    from database import db
+
+    return db
+
+
+def get_photo_store(kind: Optional[str] = None):
+    """Return the photo store of the given kind.
+
+    ``kind`` is ``"file"`` or ``"database"``; by default it is read from
+    the ``KINDERGARTEN_PHOTO_STORE`` environment variable, so this is the
+    store new uploads go to.
+    """
+    if kind is None:
+        kind = os.environ.get(PHOTO_STORE_ENV, "file")
+    if kind not in ("file", "database"):
+        raise ValueError(f"Unknown photo store: {kind}")
+    if kind not in _stores:
+        _stores[kind] = (
+            BlobPhotoStore(_default_database())
+            if kind == "database"
+            else FilePhotoStore()
+        )
+    return _stores[kind]
+
+
+def store_for(ref: str):
+    """Return the store that holds the photo a reference points to"""
+    return get_photo_store("database" if ref.startswith(BLOB_PREFIX) else "file")
+
+
+def image_source(ref: Optional[str], size: int = 100) -> Dict[str, str]:
+    """Return ``ft.Image`` arguments that show a photo from either store"""
+    if not ref:
+        return {}
+    return store_for(ref).image_source(ref, size)
+
+
+def thumbnail_source(ref: Optional[str], size: int = 100) -> Dict[str, str]:
+    """Return ``ft.Image`` arguments for a photo's thumbnail, {} if it has none.
+
+    Unlike ``image_source`` this never falls back to the full original, so
+    it is safe for lists where every row would otherwise carry the image.
+    It reads the store, so call it off the event loop.
+    """
+    if not ref:
+        return {}
+    return store_for(ref).thumbnail_source(ref, size)
+
+
+def _read_all(store, ref: str):
+    with store.open(ref) as photo:
+        while photo.read(BLOB_CHUNK_SIZE):
+            pass
+
+
+def benchmark(image_path: str, repeat: int = 20) -> List[Tuple[str, str, float]]:
+    """Time both stores on one image; returns (store, operation, ms) rows"""
+    # Local imports
+    from database import KindergartenDatabase
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        database = KindergartenDatabase(os.path.join(directory, "benchmark.db"))
+        database.initialize_database()
+        stores = {
+            "file": FilePhotoStore(os.path.join(directory, PHOTOS_DIR)),
+            "database": BlobPhotoStore(database),
+        }
+        for kind, store in stores.items():
+            ref = store.store(image_path)
+            operations = {
+                "store (duplicate)": lambda: store.store(image_path),
+                "thumbnails": lambda: store.make_thumbnails(ref),
+                "read original": lambda: _read_all(store, ref),
+                "thumbnail source": lambda: store.image_source(ref, 100),
+            }
+            for operation, func in operations.items():
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    func()
+                    samples.append((time.perf_counter() - start) * 1000)
+                results.append((kind, operation, statistics.median(samples)))
+        database.close()
+    return results
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "thumbnails":
+        if Image is None:
+            print("Pillow is required to create thumbnails (pip install Pillow)")
+            sys.exit(1)
+        print(f"Created thumbnails for {create_missing_thumbnails()} photos")
+    elif command == "gc":
+        dry_run = "--dry-run" in sys.argv[2:]
+        references = _default_database().get_photo_reference_counts()
+        if references is None:
+            print("Could not read photo references; nothing was removed")
+            sys.exit(1)
+        print(f"{len(references)} photos referenced by students")
+        action = "Would remove" if dry_run else "Removed"
+        for kind in ("file", "database"):
+            try:
+                removed, freed = get_photo_store(kind).collect_garbage(
+                    references, dry_run=dry_run
+                )
+            except sqlite3.Error as e:
+                print(f"{kind}: error collecting photos: {e}")
+                continue
+            print(
+                f"{kind}: {action} {removed} unreferenced photos "
+                f"({freed / 1024:.1f} KB)"
+            )
+    elif command == "benchmark" and len(sys.argv) > 2:
+        repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        print(f"{'store':<10} {'operation':<20} {'median ms':>10}")
+        for kind, operation, ms in benchmark(sys.argv[2], repeat):
+            print(f"{kind:<10} {operation:<20} {ms:>10.2f}")
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,126 @@
+"""Streaming report generation.
+
+The report is produced as a generator of ``(kind, text)`` lines read from
+database cursors chunk by chunk, so building it never holds more than one
+chunk of rows. ``ReportPager`` cuts the stream into fixed-size pages for
+display.
+"""
+import threading
+from itertools import islice
+from typing import Iterator, List, Tuple
+
+# Local imports
+from database import KindergartenDatabase, db as default_db
+
+# Line kinds, used by the view to pick a text style
+TITLE = "title"
+SECTION = "section"
+LINE = "line"
+
+ReportLine = Tuple[str, str]
+
+
+def iter_report_lines(
+    database: KindergartenDatabase = default_db, chunk_size: int = 500
+) -> Iterator[ReportLine]:
+    """Yield the kindergarten report line by line"""
+    stats = database.get_dashboard_stats()
+    total_financial = database.get_financial_total()
+
+    yield TITLE, "تقرير نظام إدارة رياض الأطفال"
+    yield LINE, f"إجمالي الطلاب: {stats['student_count']}"
+    yield LINE, f"القيمة المالية الإجمالية: ${total_financial:,.2f}"
+    yield LINE, f"قيمة المخزون الإجمالية: ${stats['inventory_value']:,.2f}"
+
+    yield SECTION, "الطلاب:"
+    for chunk in database.iter_students(chunk_size):
+        for s in chunk:
+            yield LINE, f"- {s.name} (العمر: {s.age})"
+
+    yield SECTION, "السجلات المالية:"
+    for chunk in database.iter_financial_records(chunk_size):
+        for r in chunk:
+            yield LINE, (
+                f"- {r.student_name} ({r.month_year}): "
+                f"شهري ${r.monthly_fee}, باص ${r.bus_fee or 0}"
+            )
+
+    yield SECTION, "عناصر المخزون:"
+    for chunk in database.iter_inventory(chunk_size):
+        for i in chunk:
+            yield LINE, (
+                f"- {i.item_name}: {i.quantity} وحدة "
+                f"@ ${i.purchase_price or 0} لكل"
+            )
+
+
+class ReportPager:
+    """Serve a report stream one page of lines at a time.
+
+    Only the current page is kept. Moving forward continues the same
+    generator; moving back restarts the stream and skips to the page, which
+    keeps memory bounded by ``page_size`` at the cost of re-reading. Calls
+    from several worker threads are serialized, since they share one
+    generator.
+    """
+
+    def __init__(self, make_stream=iter_report_lines, page_size: int = 100):
+        self.make_stream = make_stream
+        self.page_size = page_size
+        self.page_number = 0  # 1-based once a page is loaded
+        self.lines: List[ReportLine] = []
+        self.has_next = False
+        self._stream = None
+        self._lookahead: List[ReportLine] = []
+        self.lock = threading.Lock()
+
+    def _restart(self):
+        self._stream = iter(self.make_stream())
+        self._lookahead = []
+
+    def _read_page(self) -> List[ReportLine]:
+        # Read one extra line to know whether another page follows; it is
+        # kept as the first line of the next page
+        lines = self._lookahead + list(
+            islice(self._stream, self.page_size + 1 - len(self._lookahead))
+        )
+        self.has_next = len(lines) > self.page_size
+        self._lookahead = lines[self.page_size :]
+        return lines[: self.page_size]
+
+    def first(self) -> List[ReportLine]:
+        """Start the report from the beginning and return page 1"""
+        with self.lock:
+            return self._first()
+
+    def _first(self) -> List[ReportLine]:
+        self._restart()
+        self.page_number = 1
+        self.lines = self._read_page()
+        return self.lines
+
+    def next(self) -> List[ReportLine]:
+        """Advance to the next page (stays on the last page at the end)"""
+        with self.lock:
+            if self._stream is None:
+                return self._first()
+            if self.has_next:
+                self.page_number += 1
+                self.lines = self._read_page()
+            return self.lines
+
+    def previous(self) -> List[ReportLine]:
+        """Go back one page by re-streaming up to it"""
+        with self.lock:
+            target = max(1, self.page_number - 1)
+            self._restart()
+            # Skip the lines of the pages before the target
+            for _ in islice(self._stream, (target - 1) * self.page_size):
+                pass
+            self.page_number = target
+            self.lines = self._read_page()
+            return self.lines
+
+    @property
+    def has_previous(self) -> bool:
+        return self.page_number > 1
@@ -0,0 +1,123 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from typing import Dict, Optional
+
+# A session expires after this long without being used ...
+SESSION_IDLE_SECONDS = 30 * 60
+# ... and at the latest this long after login
+SESSION_MAX_SECONDS = 12 * 60 * 60
+
+# Tokens are signed with this key; set it to keep tokens of other app
+# processes valid, otherwise a random key is made per process
+SESSION_SECRET_ENV = "KINDERGARTEN_SESSION_SECRET"
+
+# Expired sessions are swept at most this often
+SWEEP_INTERVAL_SECONDS = 60
+
+
+class Session:
+    def __init__(self, session_id, username, role, created_at, expires_at):
+        self.session_id = session_id
+        self.username = username
+        self.role = role
+        self.created_at = created_at
+        self.expires_at = expires_at
+
+
+class SessionStore:
+    """In-memory sessions behind HMAC-signed tokens.
+
+    A token is ``<session id>.<signature>``, the signature being an
+    HMAC-SHA256 of the id. Forged or mangled tokens are refused by checking
+    the signature before the session table is consulted. Every successful
+    lookup slides the expiry ``idle_seconds`` forward, up to ``max_seconds``
+    after login. The session records the role the user logged in with;
+    ``AuthManager`` compares it with the current user row before allowing a
+    privileged action, which costs a lookup instead of a password hash.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[bytes] = None,
+        idle_seconds: float = SESSION_IDLE_SECONDS,
+        max_seconds: float = SESSION_MAX_SECONDS,
+        clock=time.time,
+    ):
+        if secret is None:
+            env_secret = os.environ.get(SESSION_SECRET_ENV)
+            secret = env_secret.encode() if env_secret else secrets.token_bytes(32)
+        self.secret = secret
+        self.idle_seconds = idle_seconds
+        self.max_seconds = max_seconds
+        self.clock = clock
+        self.sessions: Dict[str, Session] = {}
+        self.swept_at = clock()
+        self.lock = threading.Lock()
+
+    def _sign(self, session_id: str) -> str:
+        digest = hmac.new(self.secret, session_id.encode(), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+    def _session_id(self, token: Optional[str]) -> Optional[str]:
+        """Return the session id of a correctly signed token"""
+        if not token or token.count(".") != 1:
+            return None
+        session_id, signature = token.split(".")
+        if not hmac.compare_digest(signature, self._sign(session_id)):
+            return None
+        return session_id
+
+    def create(self, username: str, role: str) -> str:
+        """Start a session and return its token"""
+        session_id = secrets.token_urlsafe(32)
+        now = self.clock()
+        session = Session(session_id, username, role, now, now + self.idle_seconds)
+        with self.lock:
+            self._sweep(now)
+            self.sessions[session_id] = session
+        return f"{session_id}.{self._sign(session_id)}"
+
+    def get(self, token: Optional[str]) -> Optional[Session]:
+        """Get the live session of a token and extend its expiry"""
+        session_id = self._session_id(token)
+        if session_id is None:
+            return None
+        now = self.clock()
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return None
+            if session.expires_at <= now:
+                del self.sessions[session_id]
+                return None
+            session.expires_at = min(
+                now + self.idle_seconds, session.created_at + self.max_seconds
+            )
+            return session
+
+    def revoke(self, token: Optional[str]):
+        """End the session of a token"""
+        session_id = self._session_id(token)
+        if session_id is not None:
+            with self.lock:
+                self.sessions.pop(session_id, None)
+
+    def revoke_user(self, username: str):
+        """End every session of a user, e.g. after a password change"""
+        with self.lock:
+            for session_id, session in list(self.sessions.items()):
+                if session.username == username:
+                    del self.sessions[session_id]
+
+    def _sweep(self, now: float):
+        if now - self.swept_at < SWEEP_INTERVAL_SECONDS:
+            return
+        self.swept_at = now
+        for session_id, session in list(self.sessions.items()):
+            if session.expires_at <= now:
+                del self.sessions[session_id]
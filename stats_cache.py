@@ -0,0 +1,62 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+
+class StatsCache:
+    """In-memory cache for query results, invalidated per table.
+
+    Every table has a version counter that writers bump. A cached value
+    remembers the versions of the tables it was computed from and is served
+    only while all of them are unchanged.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[Hashable, Tuple[Tuple[int, ...], Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def bump(self, *tables: str):
+        """Mark tables as changed so results that read them are recomputed"""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def _stamp(self, tables: Tuple[str, ...]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def get_or_compute(
+        self, key: Hashable, tables: Iterable[str], compute: Callable[[], Any]
+    ) -> Any:
+        """Return the cached value for key, computing it if a table changed"""
+        tables = tuple(tables)
+        with self._lock:
+            stamp = self._stamp(tables)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Compute outside the lock; a write that lands meanwhile bumps the
+        # version, so the stale stamp stored here simply misses next time
+        value = compute()
+        with self._lock:
+            self._entries[key] = (stamp, value)
+        return value
+
+    def clear(self):
+        """Drop every cached value"""
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> Dict[str, Any]:
+        """Hit/miss counters and table versions for monitoring"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "versions": dict(self._versions),
+            }
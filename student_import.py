@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Bulk student import from CSV or XLSX files.
+
+Rows are parsed one at a time, validated, and inserted in chunks, each
+chunk in a single transaction. Invalid rows are reported with their line
+number and skipped; valid rows are still imported.
+
+Usage:
+    python student_import.py students.csv [--chunk-size 500] [--db kindergarten.db]
+"""
+import argparse
+import csv
+import datetime
+import io
+import os
+import re
+import sys
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Local imports
+from database import KindergartenDatabase, db as default_db
+
+# Accepted column headers, in English or as labelled in the student form
+COLUMN_ALIASES = {
+    "name": "name",
+    "اسم الطالب": "name",
+    "الاسم": "name",
+    "age": "age",
+    "العمر": "age",
+    "birth_date": "birth_date",
+    "تاريخ الميلاد": "birth_date",
+    "phone": "phone",
+    "رقم التليفون": "phone",
+    "dad_job": "dad_job",
+    "وظيفة الأب": "dad_job",
+    "mum_job": "mum_job",
+    "وظيفة الأم": "mum_job",
+    "problem": "problem",
+    "المشكلة": "problem",
+}
+REQUIRED_COLUMNS = ("name", "age", "birth_date")
+
+MAX_AGE = 18
+PHONE_PATTERN = re.compile(r"^\+?[0-9][0-9 \-]{5,19}$")
+
+# progress(fraction_done, imported, errors)
+ProgressCallback = Callable[[float, int, int], None]
+
+
+class RowError(NamedTuple):
+    line: int
+    message: str
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.errors: List[RowError] = []
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+def _normalize_header(header) -> Optional[str]:
+    return COLUMN_ALIASES.get(str(header or "").strip().lower())
+
+
+def _iter_csv(path: str) -> Iterator[Tuple[int, Dict[str, str], float]]:
+    size = os.path.getsize(path) or 1
+    with open(path, "rb") as raw:
+        # utf-8-sig strips the byte order mark Excel adds to CSV exports
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+        reader = csv.reader(text)
+        headers = [_normalize_header(h) for h in next(reader, [])]
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            row = {h: v for h, v in zip(headers, values) if h}
+            # reader.line_num counts physical lines, so it stays correct for
+            # quoted values that span several lines
+            yield reader.line_num, row, min(raw.tell() / size, 1.0)
+
+
+def _iter_xlsx(path: str) -> Iterator[Tuple[int, Dict[str, str], float]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("XLSX import requires openpyxl (pip install openpyxl)")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        total = sheet.max_row or 1
+        rows = sheet.iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if not any(value not in (None, "") for value in values):
+                continue
+            row = {}
+            for header, value in zip(headers, values):
+                if not header:
+                    continue
+                if isinstance(value, (datetime.date, datetime.datetime)):
+                    value = value.strftime("%Y-%m-%d")
+                elif isinstance(value, float) and value.is_integer():
+                    value = int(value)
+                row[header] = "" if value is None else str(value)
+            yield line, row, min(line / total, 1.0)
+    finally:
+        workbook.close()
+
+
+def iter_rows(path: str) -> Iterator[Tuple[int, Dict[str, str], float]]:
+    """Stream ``(line number, row, fraction read)`` from a CSV or XLSX file"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return _iter_csv(path)
+    if extension == ".xlsx":
+        return _iter_xlsx(path)
+    raise ValueError(f"Unsupported file type: {extension}")
+
+
+def validate_row(row: Dict[str, str]) -> Tuple[Optional[tuple], Optional[str]]:
+    """Return ``(student tuple, None)`` for a valid row or ``(None, error)``"""
+    missing = [
+        column for column in REQUIRED_COLUMNS if not row.get(column, "").strip()
+    ]
+    if missing:
+        return None, f"حقول مطلوبة فارغة: {', '.join(missing)}"
+
+    try:
+        age = int(row["age"].strip())
+    except ValueError:
+        return None, f"عمر غير صالح: {row['age']}"
+    if not 0 <= age <= MAX_AGE:
+        return None, f"العمر خارج النطاق المسموح: {age}"
+
+    birth_date = row["birth_date"].strip()
+    try:
+        parsed = datetime.datetime.strptime(birth_date, "%Y-%m-%d").date()
+    except ValueError:
+        return None, f"تاريخ ميلاد غير صالح (المطلوب YYYY-MM-DD): {birth_date}"
+    if parsed > datetime.date.today():
+        return None, f"تاريخ الميلاد في المستقبل: {birth_date}"
+
+    phone = row.get("phone", "").strip()
+    if phone and not PHONE_PATTERN.match(phone):
+        return None, f"رقم تليفون غير صالح: {phone}"
+
+    return (
+        row["name"].strip(),
+        age,
+        birth_date,
+        phone,
+        row.get("dad_job", "").strip(),
+        row.get("mum_job", "").strip(),
+        row.get("problem", "").strip(),
+    ), None
+
+
+def import_students(
+    path: str,
+    chunk_size: int = 500,
+    progress: Optional[ProgressCallback] = None,
+    database: KindergartenDatabase = default_db,
+) -> ImportReport:
+    """Validate and insert every student row of a CSV or XLSX file.
+
+    Valid rows are buffered up to ``chunk_size`` and written with one
+    ``executemany`` transaction per chunk, so memory use stays bounded by
+    the chunk size. ``progress`` is called after each chunk.
+    """
+    report = ImportReport()
+    chunk: List[tuple] = []
+    chunk_lines: List[int] = []
+
+    def flush():
+        if not chunk:
+            return
+        added = database.create_students(chunk)
+        if added:
+            report.imported += added
+        else:
+            report.errors.extend(
+                RowError(line, "فشل الحفظ في قاعدة البيانات") for line in chunk_lines
+            )
+        chunk.clear()
+        chunk_lines.clear()
+
+    for line, row, fraction in iter_rows(path):
+        student, error = validate_row(row)
+        if error:
+            report.errors.append(RowError(line, error))
+            continue
+        chunk.append(student)
+        chunk_lines.append(line)
+        if len(chunk) >= chunk_size:
+            flush()
+            if progress:
+                progress(fraction, report.imported, len(report.errors))
+
+    flush()
+    if progress:
+        progress(1.0, report.imported, len(report.errors))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import students from CSV/XLSX")
+    parser.add_argument("path", help="CSV or XLSX file with one student per row")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--db", default="kindergarten.db", help="Database file")
+    args = parser.parse_args(argv)
+
+    def print_progress(fraction, imported, errors):
+        print(
+            f"\r{fraction:6.1%}  imported: {imported}  errors: {errors}",
+            end="",
+            flush=True,
+        )
+
+    database = KindergartenDatabase(args.db)
+    try:
+        report = import_students(
+            args.path, args.chunk_size, print_progress, database=database
+        )
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Import error: {e}")
+        return 1
+    print()
+    for error in report.errors:
+        print(f"line {error.line}: {error.message}")
+    print(f"Imported {report.imported} students, {len(report.errors)} rows skipped")
+    return 0 if report.ok else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Local imports
+from report_engine import LINE, ReportPager
+
+
+def slow_stream(count=50):
+    for number in range(count):
+        # Give other threads a chance to enter the generator meanwhile
+        time.sleep(0.001)
+        yield LINE, str(number)
+
+
+def test_concurrent_moves_are_serialized():
+    pager = ReportPager(make_stream=slow_stream, page_size=5)
+    pager.first()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pages = list(executor.map(lambda _: pager.next(), range(4)))
+
+    assert pager.page_number == 5
+    assert [int(text) for _, text in pager.lines] == list(range(20, 25))
+    assert sorted(page[0][1] for page in pages) == ["10", "15", "20", "5"]
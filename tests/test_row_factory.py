@@ -0,0 +1,34 @@
+import sqlite3
+
+import pytest
+
+# Local imports
+from DTOs import FinancialRecordRow, RowConversionError, row_factory
+
+
+def read_record(paid, monthly_fee=100):
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = row_factory(FinancialRecordRow)
+    try:
+        return connection.execute(
+            "SELECT 1 AS id, 2 AS student_id, ? AS monthly_fee, NULL AS bus_fee, "
+            "'2024-01' AS month_year, ? AS paid",
+            (monthly_fee, paid),
+        ).fetchone()
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize(
+    "stored, expected",
+    [(0, False), (1, True), ("0", False), ("false", False), ("True", True)],
+)
+def test_paid_flag_spellings(stored, expected):
+    assert read_record(stored).paid is expected
+
+
+def test_unconvertible_value_raises():
+    with pytest.raises(RowConversionError, match="FinancialRecordRow.paid"):
+        read_record("maybe")
+    with pytest.raises(sqlite3.DataError):
+        read_record(0, monthly_fee="abc")
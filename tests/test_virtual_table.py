@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import flet as ft
+
+# Local imports
+from database import Page
+from view.virtual_table import EDGE_THRESHOLD, VirtualDataTable
+
+
+def scroll_event(table, pixels, max_scroll_extent, viewport_dimension=480):
+    """Build the event Flet hands to ``on_scroll`` from a client message"""
+    data = json.dumps(
+        {
+            "t": "update",
+            "p": pixels,
+            "minse": 0,
+            "maxse": max_scroll_extent,
+            "vd": viewport_dimension,
+        }
+    )
+    control_event = ft.ControlEvent("_1", "scroll", data, table.scroller, None)
+    return ft.OnScrollEvent(control_event)
+
+
+def make_table(next_cursor=("b", 2), prev_cursor=("a", 1)):
+    """Table with one loaded page that records which edge it loads"""
+    table = VirtualDataTable(
+        columns=[ft.DataColumn(ft.Text("name"))],
+        fetch_page=None,
+        build_cells=lambda row: [ft.DataCell(ft.Text(row))],
+        sort_key=lambda row: row,
+    )
+    table.pages.append(Page(["row"], next_cursor, prev_cursor))
+    table.loaded = []
+
+    async def load_next(pixels):
+        table.loaded.append(("next", pixels))
+
+    async def load_previous(pixels):
+        table.loaded.append(("previous", pixels))
+
+    table.load_next = load_next
+    table.load_previous = load_previous
+    return table
+
+
+def scroll(table, pixels, max_scroll_extent):
+    asyncio.run(table.handle_scroll(scroll_event(table, pixels, max_scroll_extent)))
+    return table.loaded
+
+
+def test_near_bottom_loads_next_page():
+    table = make_table()
+    assert scroll(table, 2000 - EDGE_THRESHOLD + 1, 2000) == [
+        ("next", 2000 - EDGE_THRESHOLD + 1)
+    ]
+
+
+def test_near_top_loads_previous_page():
+    table = make_table()
+    assert scroll(table, 10, 2000) == [("previous", 10)]
+
+
+def test_middle_loads_nothing():
+    table = make_table()
+    assert scroll(table, 1000, 2000) == []
+
+
+def test_last_page_does_not_load_next():
+    table = make_table(next_cursor=None)
+    assert scroll(table, 1990, 2000) == []
+    assert not table.loading
@@ -0,0 +1,69 @@
+"""Arabic-aware text normalization for full-text search.
+
+Text is folded the same way when it is indexed and when it is searched, so
+``احمد`` finds ``أحمد`` and ``فاطمه`` finds ``فاطِمة``. The folding is applied
+in Python to queries and as nested ``replace()`` calls in the triggers that
+keep the FTS index in sync, so any SQLite client (including the ``sqlite3``
+shell or a DB browser) can write to ``students`` without extra functions.
+"""
+from typing import Dict, List
+
+# Letter variants folded to one form; diacritics and tatweel are removed
+ARABIC_FOLDS: Dict[str, str] = {
+    "أ": "ا",  # alef with hamza above -> alef
+    "إ": "ا",  # alef with hamza below -> alef
+    "آ": "ا",  # alef with madda -> alef
+    "ٱ": "ا",  # alef wasla -> alef
+    "ى": "ي",  # alef maksura -> ya
+    "ئ": "ي",  # ya with hamza -> ya
+    "ؤ": "و",  # waw with hamza -> waw
+    "ة": "ه",  # ta marbuta -> ha
+    "ـ": "",  # tatweel
+    "ً": "",  # fathatan
+    "ٌ": "",  # dammatan
+    "ٍ": "",  # kasratan
+    "َ": "",  # fatha
+    "ُ": "",  # damma
+    "ِ": "",  # kasra
+    "ّ": "",  # shadda
+    "ْ": "",  # sukun
+    "ٰ": "",  # superscript alef
+}
+
+_TRANSLATION = str.maketrans(ARABIC_FOLDS)
+
+
+def normalize_arabic(text: str) -> str:
+    """Fold Arabic letter variants and strip diacritics"""
+    return (text or "").translate(_TRANSLATION).lower()
+
+
+def normalize_sql(expression: str) -> str:
+    """Return an SQL expression applying ``normalize_arabic`` to another.
+
+    Case folding is left to the FTS5 tokenizer.
+    """
+    sql = f"coalesce({expression}, '')"
+    for char, replacement in ARABIC_FOLDS.items():
+        sql = f"replace({sql}, '{char}', '{replacement}')"
+    return sql
+
+
+def fts_query(text: str) -> str:
+    """Turn user input into an FTS5 query matching every word as a prefix.
+
+    Each word is quoted, so FTS5 operators and punctuation typed by the
+    user are searched for literally. Returns an empty string when there is
+    nothing to search for.
+    """
+    terms: List[str] = []
+    for word in normalize_arabic(text).split():
+        word = word.replace('"', '""')
+        terms.append(f'"{word}"*')
+    return " ".join(terms)
+
+
+def like_pattern(text: str) -> str:
+    """Return a LIKE pattern matching ``text`` anywhere, used with ESCAPE '\\'"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
@@ -0,0 +1,103 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Local imports
+from database import KindergartenDatabase
+from DTOs import UserRow
+
+# Seconds a lookup may be answered from memory before the users table
+# version is checked again
+CHECK_INTERVAL = 1.0
+
+
+class UserCache:
+    """In-memory copy of the users table kept coherent with the database.
+
+    Triggers stamp every changed user row with a new users-table version
+    (see migration 5). Lookups are answered from memory; at most every
+    ``check_interval`` seconds the cache reads that version, a one-row
+    primary key lookup, and only when it moved does it fetch the rows
+    changed since, so writes from other app processes sharing the database
+    show up within ``check_interval``. Deleted users are noticed when the
+    row count no longer matches the cache. Call ``invalidate()`` after
+    writing users in this process to see the change on the next lookup.
+    """
+
+    def __init__(
+        self, database: KindergartenDatabase, check_interval: float = CHECK_INTERVAL
+    ):
+        self.database = database
+        self.check_interval = check_interval
+        self.users: Dict[int, UserRow] = {}
+        self.ids: Dict[str, int] = {}  # username -> id
+        self.version = -1
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[UserRow]:
+        """Get a user row by username"""
+        self.refresh()
+        user_id = self.ids.get(username)
+        return None if user_id is None else self.users.get(user_id)
+
+    def all(self) -> List[UserRow]:
+        """Get all user rows ordered by username"""
+        self.refresh()
+        return sorted(self.users.values(), key=lambda user: user.username)
+
+    def invalidate(self):
+        """Check the database on the next lookup"""
+        self.checked_at = None
+
+    def refresh(self, force: bool = False):
+        """Fetch users changed since the last check, if the check is due"""
+        with self.lock:
+            now = time.monotonic()
+            if (
+                not force
+                and self.checked_at is not None
+                and now - self.checked_at < self.check_interval
+            ):
+                return
+            self.checked_at = now
+
+            version = self.database.get_table_version("users")
+            if version is not None and version == self.version:
+                return
+            if version is None:
+                # Version tracking unavailable; reload everything
+                self._replace(self.database.get_all_users())
+                return
+
+            changes = self.database.get_users_since(self.version)
+            if changes is None:
+                self.checked_at = None  # retry on the next lookup
+                return
+            self.version, count, changed = changes
+            for user in changed:
+                self._store(user)
+            if count != len(self.users):
+                # Some cached users were deleted
+                existing = set(self.database.get_user_ids())
+                if existing or not count:
+                    for user_id in set(self.users) - existing:
+                        self._remove(user_id)
+
+    def _replace(self, users: List[UserRow]):
+        self.users.clear()
+        self.ids.clear()
+        for user in users:
+            self._store(user)
+
+    def _store(self, user: UserRow):
+        previous = self.users.get(user.id)
+        if previous is not None and previous.username != user.username:
+            self.ids.pop(previous.username, None)
+        self.users[user.id] = user
+        self.ids[user.username] = user.id
+
+    def _remove(self, user_id: int):
+        user = self.users.pop(user_id)
+        if self.ids.get(user.username) == user_id:
+            del self.ids[user.username]
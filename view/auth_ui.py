@@ -2,10 +2,14 @@ import flet as ft
 
 # Local imports
 from kindergarten_management import auth_manager
+from password_hashing import run_hashing
 
 # This will be set by the main application
 show_main_system_callback = None
 
+# Key of the session token in page.session and the browser's client storage
+SESSION_TOKEN_KEY = "kindergarten.session_token"
+
 
 def set_show_main_system_callback(callback):
     """Set the callback function to show the main system"""
@@ -13,6 +17,43 @@ def set_show_main_system_callback(callback):
     show_main_system_callback = callback
 
 
+def remember_session(page: ft.Page, token):
+    """Keep a session token for this page and for reconnects of the client"""
+    page.session.set(SESSION_TOKEN_KEY, token)
+    page.client_storage.set(SESSION_TOKEN_KEY, token)
+
+
+def resume_session(page: ft.Page):
+    """Return the user of the session saved by the client, or None"""
+    token = page.client_storage.get(SESSION_TOKEN_KEY)
+    if not token:
+        return None
+    user = auth_manager.resume_session(token)
+    if user is None:
+        page.client_storage.remove(SESSION_TOKEN_KEY)
+        return None
+    page.session.set(SESSION_TOKEN_KEY, token)
+    return user
+
+
+def end_session(page: ft.Page):
+    """Log out the session of this page"""
+    token = page.session.get(SESSION_TOKEN_KEY)
+    if token:
+        auth_manager.end_session(token)
+        page.session.remove(SESSION_TOKEN_KEY)
+    if page.client_storage.contains_key(SESSION_TOKEN_KEY):
+        page.client_storage.remove(SESSION_TOKEN_KEY)
+
+
+def admin_session_token(page: ft.Page):
+    """Return the session token of this page if an admin is logged in"""
+    token = page.session.get(SESSION_TOKEN_KEY)
+    if not auth_manager.is_admin_session(token):
+        return None
+    return token
+
+
 def show_forgot_password_dialog(page: ft.Page):
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
@@ -51,13 +92,18 @@ def show_forgot_password_dialog(page: ft.Page):
         text_align=ft.TextAlign.RIGHT,
     )
 
+    # A logged-in admin is not asked for credentials again
+    session_token = admin_session_token(page)
+    admin_username_field.visible = session_token is None
+    admin_password_field.visible = session_token is None
+
     reset_button = ft.ElevatedButton("إعادة تعيين كلمة المرور", width=300, height=50)
 
     cancel_button = ft.TextButton("إلغاء", width=300)
     error_text = ft.Text("", color=ft.Colors.RED)
     success_text = ft.Text("", color=ft.Colors.GREEN)
 
-    def handle_reset(e):
+    async def handle_reset(e):
         admin_username = (
             admin_username_field.value.strip() if admin_username_field.value else ""
         )
@@ -75,15 +121,10 @@ def show_forgot_password_dialog(page: ft.Page):
         )
 
         # Validation
-        if not all(
-            [
-                admin_username,
-                admin_password,
-                target_username,
-                new_password,
-                confirm_password,
-            ]
-        ):
+        required = [target_username, new_password, confirm_password]
+        if session_token is None:
+            required += [admin_username, admin_password]
+        if not all(required):
             error_text.value = "يرجى ملء جميع الحقول"
             page.update()
             return
@@ -93,9 +134,14 @@ def show_forgot_password_dialog(page: ft.Page):
             page.update()
             return
 
-        # Reset password
-        success, message = auth_manager.reset_password(
-            target_username, new_password, admin_username, admin_password
+        # Reset password; hashing runs on its own pool
+        success, message = await run_hashing(
+            auth_manager.reset_password,
+            target_username,
+            new_password,
+            admin_username,
+            admin_password,
+            session_token,
         )
 
         if success:
@@ -183,13 +229,18 @@ def show_create_account_dialog(page: ft.Page):
         text_align=ft.TextAlign.RIGHT,
     )
 
+    # A logged-in admin is not asked for credentials again
+    session_token = admin_session_token(page)
+    admin_username_field.visible = session_token is None
+    admin_password_field.visible = session_token is None
+
     create_button = ft.ElevatedButton("إنشاء حساب", width=300, height=50)
 
     cancel_button = ft.TextButton("إلغاء", width=300)
     error_text = ft.Text("", color=ft.Colors.RED)
     success_text = ft.Text("", color=ft.Colors.GREEN)
 
-    def handle_create(e):
+    async def handle_create(e):
         admin_username = (
             admin_username_field.value.strip() if admin_username_field.value else ""
         )
@@ -208,15 +259,10 @@ def show_create_account_dialog(page: ft.Page):
         role = role_dropdown.value or ""
 
         # Validation
-        if not all(
-            [
-                admin_username,
-                admin_password,
-                new_username,
-                new_password,
-                confirm_password,
-            ]
-        ):
+        required = [new_username, new_password, confirm_password]
+        if session_token is None:
+            required += [admin_username, admin_password]
+        if not all(required):
             error_text.value = "يرجى ملء جميع الحقول"
             page.update()
             return
@@ -226,9 +272,9 @@ def show_create_account_dialog(page: ft.Page):
             page.update()
             return
 
-        # Verify admin credentials first
-        admin_auth, admin_msg = auth_manager.verify_admin(
-            admin_username, admin_password
+        # Verify the admin first; checking credentials hashes on its own pool
+        admin_auth, admin_msg = await run_hashing(
+            auth_manager.verify_admin, admin_username, admin_password, session_token
         )
         if not admin_auth:
             error_text.value = admin_msg
@@ -236,7 +282,9 @@ def show_create_account_dialog(page: ft.Page):
             return
 
         # Create new user
-        success, message = auth_manager.create_user(new_username, new_password, role)
+        success, message = await run_hashing(
+            auth_manager.create_user, new_username, new_password, role
+        )
 
         if success:
             success_text.value = message
@@ -296,8 +344,9 @@ def show_login_page(page: ft.Page):
     login_button = ft.ElevatedButton("تسجيل الدخول", width=300, height=50)
 
     login_error_text = ft.Text("", color=ft.Colors.RED)
+    login_progress = ft.ProgressRing(width=24, height=24, visible=False)
 
-    def handle_login(e):
+    async def handle_login(e):
         username = username_field.value.strip() if username_field.value else ""
         password = password_field.value.strip() if password_field.value else ""
 
@@ -306,8 +355,24 @@ def show_login_page(page: ft.Page):
             page.update()
             return
 
-        success, result = auth_manager.authenticate(username, password)
+        # Failed attempts are throttled per client as well as per username;
+        # desktop sessions have no IP, so fall back to the session id
+        client = page.client_ip or page.session_id
+
+        # Authenticate on the hashing pool so the spinner keeps animating
+        login_button.disabled = True
+        login_progress.visible = True
+        page.update()
+        try:
+            success, result = await run_hashing(
+                auth_manager.authenticate, username, password, client
+            )
+        finally:
+            login_button.disabled = False
+            login_progress.visible = False
+
         if success:
+            remember_session(page, auth_manager.start_session(result))
             if show_main_system_callback:
                 show_main_system_callback(page, result)
             # Clear any previous error message
@@ -342,6 +407,7 @@ def show_login_page(page: ft.Page):
             username_field,
             password_field,
             login_button,
+            login_progress,
             ft.Row(
                 [forgot_password_link, create_account_link],
                 alignment=ft.MainAxisAlignment.CENTER,
@@ -3,7 +3,14 @@ import time
 import asyncio
 
 # Local imports
-from view.auth_ui import set_show_main_system_callback, show_login_page
+from view.auth_ui import (
+    admin_session_token,
+    end_session,
+    set_show_main_system_callback,
+    show_create_account_dialog,
+    show_forgot_password_dialog,
+    show_login_page,
+)
 from database import db
 from view.financial_ui import create_financial_tab
 from view.inventory_ui import create_inventory_tab
@@ -120,10 +127,6 @@ def create_dashboard(page: ft.Page, current_user):
     else:
         page.title = "لوحة تحكم نظام إدارة رياض الأطفال - غير مسجل الدخول"
 
-    # Data storage
-    financial_records = []
-    inventory_items = []
-
     # Create navigation destinations
     nav_destinations = [
         ft.NavigationRailDestination(
@@ -148,9 +151,7 @@ def create_dashboard(page: ft.Page, current_user):
     # Create custom hover navigation rail
     nav_rail = HoverNavigationRail(
         destinations=nav_destinations,
-        on_change=lambda e: handle_navigation_change(
-            e, page, current_user, financial_records, inventory_items
-        ),
+        on_change=lambda e: handle_navigation_change(e, page, current_user),
     )
 
     # Dashboard header with user info and clock
@@ -169,6 +170,20 @@ def create_dashboard(page: ft.Page, current_user):
                 color=ft.Colors.BLUE_700,
             ),
             ft.Container(expand=True),
+            # Admins manage accounts with their session, without re-entering
+            # their password
+            ft.IconButton(
+                icon=ft.Icons.PERSON_ADD,
+                tooltip="إنشاء حساب جديد",
+                visible=admin_session_token(page) is not None,
+                on_click=lambda e: show_create_account_dialog(page),
+            ),
+            ft.IconButton(
+                icon=ft.Icons.LOCK_RESET,
+                tooltip="إعادة تعيين كلمة المرور",
+                visible=admin_session_token(page) is not None,
+                on_click=lambda e: show_forgot_password_dialog(page),
+            ),
             DigitalClock(),  # Digital clock added here
             ft.Text(
                 f"مرحباً: {current_user.username if current_user else 'زائر'}",
@@ -270,23 +285,17 @@ def create_dashboard(page: ft.Page, current_user):
                     ft.ElevatedButton(
                         "تسجيل طالب جديد",
                         icon=ft.Icons.PERSON_ADD,
-                        on_click=lambda e: show_student_tab(
-                            page, current_user, financial_records, inventory_items
-                        ),
+                        on_click=lambda e: show_student_tab(page, current_user),
                     ),
                     ft.ElevatedButton(
                         "إضافة سجل مالي",
                         icon=ft.Icons.ADD_BUSINESS,
-                        on_click=lambda e: show_financial_tab(
-                            page, current_user, financial_records, inventory_items
-                        ),
+                        on_click=lambda e: show_financial_tab(page, current_user),
                     ),
                     ft.ElevatedButton(
                         "إدارة المخزون",
                         icon=ft.Icons.INVENTORY,
-                        on_click=lambda e: show_inventory_tab(
-                            page, current_user, financial_records, inventory_items
-                        ),
+                        on_click=lambda e: show_inventory_tab(page, current_user),
                     ),
                 ],
                 spacing=10,
@@ -321,35 +330,36 @@ def create_dashboard(page: ft.Page, current_user):
 def update_dashboard_stats(stats_row):
     """Update dashboard statistics with real data"""
     try:
-        # Get students count
-        students = db.get_all_students()
-        students_count = len(students)
-
-        # Get inventory count
-        inventory = db.get_all_inventory()
-        inventory_count = len(inventory)
+        # Counts and totals come from one aggregate query
+        stats = db.get_dashboard_stats()
 
         # Update stats cards
-        stats_row.controls[0].content.controls[1].value = str(students_count)
-        stats_row.controls[2].content.controls[1].value = str(inventory_count)
+        stats_row.controls[0].content.controls[1].value = str(stats["student_count"])
+        stats_row.controls[1].content.controls[1].value = (
+            f"${stats['monthly_revenue']:,.2f}"
+        )
+        stats_row.controls[2].content.controls[1].value = str(
+            stats["inventory_count"]
+        )
+        stats_row.controls[3].content.controls[1].value = str(stats["user_count"])
 
     except Exception as e:
         print(f"Error updating dashboard stats: {e}")
 
 
-def handle_navigation_change(e, page, current_user, financial_records, inventory_items):
+def handle_navigation_change(e, page, current_user):
     """Handle navigation rail selection changes"""
     index = e.control.selected_index
     if index == 0:  # Home
         show_dashboard(page, current_user)
     elif index == 1:  # Students
-        show_student_tab(page, current_user, financial_records, inventory_items)
+        show_student_tab(page, current_user)
     elif index == 2:  # Financial
-        show_financial_tab(page, current_user, financial_records, inventory_items)
+        show_financial_tab(page, current_user)
     elif index == 3:  # Inventory
-        show_inventory_tab(page, current_user, financial_records, inventory_items)
+        show_inventory_tab(page, current_user)
     elif index == 4:  # Reports
-        show_reports_tab(page, current_user, financial_records, inventory_items)
+        show_reports_tab(page, current_user)
 
 
 def show_dashboard(page, current_user):
@@ -360,7 +370,7 @@ def show_dashboard(page, current_user):
     page.update()
 
 
-def show_student_tab(page, current_user, financial_records, inventory_items):
+def show_student_tab(page, current_user):
     """Show student registration tab"""
     page.clean()
     student_tab = create_student_registration_tab(page)
@@ -369,7 +379,7 @@ def show_student_tab(page, current_user, financial_records, inventory_items):
     page.update()
 
 
-def show_financial_tab(page, current_user, financial_records, inventory_items):
+def show_financial_tab(page, current_user):
     """Show financial management tab"""
     page.clean()
     financial_tab = create_financial_tab(page)
@@ -378,7 +388,7 @@ def show_financial_tab(page, current_user, financial_records, inventory_items):
     page.update()
 
 
-def show_inventory_tab(page, current_user, financial_records, inventory_items):
+def show_inventory_tab(page, current_user):
     """Show inventory management tab"""
     page.clean()
     inventory_tab = create_inventory_tab(page)
@@ -387,10 +397,10 @@ def show_inventory_tab(page, current_user, financial_records, inventory_items):
     page.update()
 
 
-def show_reports_tab(page, current_user, financial_records, inventory_items):
+def show_reports_tab(page, current_user):
     """Show reports tab"""
     page.clean()
-    reports_tab = create_reports_tab(page, financial_records, inventory_items)
+    reports_tab = create_reports_tab(page)
     page.add(create_back_button(page, current_user))
     page.add(reports_tab)
     page.update()
@@ -412,7 +422,8 @@ def create_back_button(page, current_user):
 
 
 def back_to_login(page: ft.Page):
-    """Return to login page"""
+    """Log out and return to login page"""
+    end_session(page)
     page.clean()
     show_login_page(page)
 
@@ -1,72 +1,180 @@
+import datetime
 import flet as ft
 
 # Local imports
-from kindergarten_management import FinancialRecord
+from async_database import async_db
+from database import db
+from DTOs import FinancialRecordRow, to_decimal
+from view.search_controller import SearchController
+
+# Most recent records shown under the form
+FINANCIAL_LIST_LIMIT = 100
+
+
+def build_financial_tile(record):
+    """Build the list entry for one financial record"""
+    return ft.ListTile(
+        title=ft.Text(f"{record.student_name} ({record.month_year})"),
+        subtitle=ft.Text(f"شهري: ${record.monthly_fee}, باص: ${record.bus_fee or 0}"),
+    )
 
 
 def create_financial_tab(page: ft.Page):
     """Create and return the financial management tab"""
     # Financial Management Form in Arabic
-    financial_student_name = ft.TextField(label="اسم الطالب")
+    financial_student_id = ft.TextField(
+        label="رقم الطالب", keyboard_type=ft.KeyboardType.NUMBER
+    )
+    student_name_text = ft.Text("", size=14, color=ft.Colors.GREY)
     monthly_fee = ft.TextField(
         label="المصروفات الشهرية", keyboard_type=ft.KeyboardType.NUMBER
     )
     bus_fee = ft.TextField(label="أجرة الباص", keyboard_type=ft.KeyboardType.NUMBER)
+    month_year = ft.TextField(
+        label="الشهر (YYYY-MM)", value=datetime.date.today().strftime("%Y-%m")
+    )
 
-    # Data storage
-    financial_records = []
+    async def lookup_student():
+        """Return the student for the entered ID, or None"""
+        try:
+            student_id = int(financial_student_id.value or "")
+        except ValueError:
+            return None
+        return await async_db.get_student(student_id)
 
-    def add_financial_record(e):
-        if financial_student_name.value and monthly_fee.value:
-            record = FinancialRecord(
-                student_name=financial_student_name.value,
-                monthly_fee=monthly_fee.value,
-                bus_fee=bus_fee.value,
-            )
-            financial_records.append(record)
-            financial_student_name.value = ""
-            monthly_fee.value = ""
-            bus_fee.value = ""
-            update_financial_list()
-            snackbar = ft.SnackBar(
-                content=ft.Text("تم إضافة السجل المالي بنجاح!"),
-                bgcolor=ft.Colors.GREEN,
-                duration=3000,
-            )
-            page.overlay.append(snackbar)
-            page.update()
-            snackbar.open = True
-            snackbar.update()
-            page.update()
+    def show_student_name(query, student):
+        if student:
+            student_name_text.value = student.name
+            student_name_text.color = ft.Colors.GREEN
+        elif query:
+            student_name_text.value = "لا يوجد طالب بهذا الرقم"
+            student_name_text.color = ft.Colors.RED
+        else:
+            student_name_text.value = ""
+        page.update()
+
+    # Debounced like the search field, so a slow lookup for an earlier ID
+    # never replaces the name shown for the current one. Nothing is cached:
+    # a student added in another tab must be found right away.
+    student_lookup = SearchController(
+        lambda query: db.get_student(int(query)) if query.isdigit() else None,
+        show_student_name,
+        cache_size=0,
+    )
+    financial_student_id.on_change = student_lookup.handle_change
+
+    def show_snackbar(message, color):
+        snackbar = ft.SnackBar(
+            content=ft.Text(message),
+            bgcolor=color,
+            duration=3000,
+        )
+        page.overlay.append(snackbar)
+        page.update()
+        snackbar.open = True
+        snackbar.update()
+        page.update()
+
+    async def add_financial_record(e):
+        if not (financial_student_id.value and monthly_fee.value):
+            return
+
+        student = await lookup_student()
+        if student is None:
+            show_snackbar("لا يوجد طالب بهذا الرقم!", ft.Colors.RED)
+            return
+
+        try:
+            monthly = float(monthly_fee.value)
+            bus = float(bus_fee.value or 0)
+            datetime.datetime.strptime(month_year.value or "", "%Y-%m")
+        except ValueError:
+            show_snackbar("يرجى إدخال قيم صحيحة!", ft.Colors.RED)
+            return
+
+        if not await async_db.add_financial_record(
+            student.id, monthly, bus, month_year.value
+        ):
+            show_snackbar("فشل في إضافة السجل المالي!", ft.Colors.RED)
+            return
+
+        recent_tiles.insert(
+            0,
+            build_financial_tile(
+                FinancialRecordRow(
+                    id=None,
+                    student_id=student.id,
+                    monthly_fee=to_decimal(monthly),
+                    bus_fee=to_decimal(bus),
+                    month_year=month_year.value,
+                    student_name=student.name,
+                )
+            ),
+        )
+        del recent_tiles[FINANCIAL_LIST_LIMIT:]
+        financial_search.clear()
+        await financial_search.submit(search_field.value)
+        financial_student_id.value = ""
+        await student_lookup.submit("")
+        monthly_fee.value = ""
+        bus_fee.value = ""
+        show_snackbar("تم إضافة السجل المالي بنجاح!", ft.Colors.GREEN)
 
     add_financial_btn = ft.ElevatedButton(
         "إضافة سجل مالي", on_click=add_financial_record
     )
 
-    financial_list = ft.Column()
-
-    def update_financial_list():
-        financial_list.controls.clear()
-        for record in financial_records:
-            financial_list.controls.append(
-                ft.ListTile(
-                    title=ft.Text(record.student_name),
-                    subtitle=ft.Text(
-                        f"شهري: ${record.monthly_fee}, باص: ${record.bus_fee}"
-                    ),
-                )
+    # The most recent records, loaded on the worker pool once the tab is
+    # shown; search results replace them in the list while the search box
+    # holds text
+    recent_tiles = []
+    financial_list = ft.Column(recent_tiles)
+    search_status = ft.Text("", size=12, color=ft.Colors.GREY)
+
+    def show_search_results(query, records):
+        if records is None:
+            financial_list.controls = recent_tiles
+            search_status.value = ""
+        else:
+            financial_list.controls = [
+                build_financial_tile(record) for record in records
+            ]
+            search_status.value = (
+                f"عدد النتائج: {len(records)}" if records else "لا توجد نتائج"
             )
+        page.update()
+
+    financial_search = SearchController(
+        lambda query: db.search_financial_records(query, FINANCIAL_LIST_LIMIT),
+        show_search_results,
+    )
+    search_field = ft.TextField(
+        label="بحث باسم الطالب أو الشهر",
+        prefix_icon=ft.Icons.SEARCH,
+        on_change=financial_search.handle_change,
+    )
+
+    async def load_recent_records():
+        records = await async_db.get_financial_records(limit=FINANCIAL_LIST_LIMIT)
+        recent_tiles[:] = [build_financial_tile(record) for record in records]
+        page.update()
+
+    page.run_task(load_recent_records)
 
     return ft.Column(
         [
             ft.Text("الإدارة المالية", size=24, weight=ft.FontWeight.BOLD),
             ft.Divider(),
-            financial_student_name,
+            financial_student_id,
+            student_name_text,
             monthly_fee,
             bus_fee,
+            month_year,
             add_financial_btn,
             ft.Divider(),
             ft.Text("السجلات المالية:", size=18, weight=ft.FontWeight.BOLD),
+            search_field,
+            search_status,
             financial_list,
         ],
         scroll=ft.ScrollMode.AUTO,
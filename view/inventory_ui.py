@@ -1,7 +1,36 @@
 import flet as ft
 
 # Local imports
-from kindergarten_management import InventoryItem
+from async_database import async_db
+from database import db
+from view.search_controller import SearchController
+from view.virtual_table import VirtualDataTable
+
+# Rows fetched per page by the inventory table
+INVENTORY_PAGE_SIZE = 50
+
+# Matching items shown for a search
+SEARCH_RESULTS_LIMIT = 50
+
+
+def build_inventory_columns():
+    """Build the column headers of an inventory table"""
+    return [
+        ft.DataColumn(ft.Text("اسم الأداة")),
+        ft.DataColumn(ft.Text("الكمية")),
+        ft.DataColumn(ft.Text("سعر الشراء")),
+        ft.DataColumn(ft.Text("الوصف")),
+    ]
+
+
+def build_inventory_cells(item):
+    """Build the table cells for one inventory row"""
+    return [
+        ft.DataCell(ft.Text(item.item_name)),
+        ft.DataCell(ft.Text(str(item.quantity))),
+        ft.DataCell(ft.Text(f"${item.purchase_price}")),
+        ft.DataCell(ft.Text(item.description or "-")),
+    ]
 
 
 def create_inventory_tab(page: ft.Page):
@@ -12,47 +41,140 @@ def create_inventory_tab(page: ft.Page):
     purchase_price = ft.TextField(
         label="سعر الشراء", keyboard_type=ft.KeyboardType.NUMBER
     )
+    description = ft.TextField(label="الوصف")
 
-    inventory_items = []
+    # Items collected during a stock-take, saved together in one transaction
+    pending_items = []
+    pending_text = ft.Text("", size=14, color=ft.Colors.GREY)
 
-    def add_inventory_item(e):
-        if item_name.value and item_quantity.value:
-            item = InventoryItem(
-                item_name=item_name.value,
-                quantity=item_quantity.value,
-                purchase_price=purchase_price.value,
-            )
-            inventory_items.append(item)
-            item_name.value = ""
-            item_quantity.value = ""
-            purchase_price.value = ""
-            update_inventory_list()
-            snackbar = ft.SnackBar(
-                content=ft.Text("تم إضافة العنصر بنجاح!"),
-                bgcolor=ft.Colors.GREEN,
-                duration=3000,
-            )
-            page.overlay.append(snackbar)
-            page.update()
-            snackbar.open = True
-            snackbar.update()
-            page.update()
+    def show_snackbar(message, color):
+        snackbar = ft.SnackBar(
+            content=ft.Text(message),
+            bgcolor=color,
+            duration=3000,
+        )
+        page.overlay.append(snackbar)
+        page.update()
+        snackbar.open = True
+        snackbar.update()
+        page.update()
+
+    def read_form():
+        """Return the form as an inventory tuple, or None if it is invalid"""
+        if not (item_name.value and item_quantity.value):
+            return None
+        try:
+            quantity = int(item_quantity.value)
+            price = float(purchase_price.value or 0)
+        except ValueError:
+            show_snackbar("يرجى إدخال قيم صحيحة!", ft.Colors.RED)
+            return None
+        return (item_name.value, quantity, price, description.value or "")
+
+    def clear_form():
+        item_name.value = ""
+        item_quantity.value = ""
+        purchase_price.value = ""
+        description.value = ""
+
+    def update_pending_text():
+        pending_text.value = (
+            f"عناصر بانتظار الحفظ: {len(pending_items)}" if pending_items else ""
+        )
+
+    async def add_inventory_item(e):
+        item = read_form()
+        if item is None:
+            return
+        if await async_db.add_inventory_item(*item):
+            clear_form()
+            await refresh_inventory()
+            show_snackbar("تم إضافة العنصر بنجاح!", ft.Colors.GREEN)
+        else:
+            show_snackbar("فشل في إضافة العنصر!", ft.Colors.RED)
+
+    def queue_inventory_item(e):
+        item = read_form()
+        if item is None:
+            return
+        pending_items.append(item)
+        clear_form()
+        update_pending_text()
+        page.update()
+
+    async def save_pending_items(e):
+        if not pending_items:
+            return
+        # Items queued while the batch is being written stay pending
+        batch = list(pending_items)
+        added = await async_db.add_inventory_items(batch)
+        if added:
+            del pending_items[: len(batch)]
+            update_pending_text()
+            await refresh_inventory()
+            show_snackbar(f"تم حفظ {added} عنصر بنجاح!", ft.Colors.GREEN)
+        else:
+            show_snackbar("فشل في حفظ العناصر!", ft.Colors.RED)
 
     add_inventory_btn = ft.ElevatedButton("إضافة عنصر", on_click=add_inventory_item)
+    queue_inventory_btn = ft.ElevatedButton(
+        "إضافة إلى القائمة", icon=ft.Icons.PLAYLIST_ADD, on_click=queue_inventory_item
+    )
+    save_pending_btn = ft.ElevatedButton(
+        "حفظ القائمة", icon=ft.Icons.SAVE, on_click=save_pending_items
+    )
+
+    inventory_table = VirtualDataTable(
+        columns=build_inventory_columns(),
+        fetch_page=db.get_inventory_page,
+        build_cells=build_inventory_cells,
+        sort_key=lambda item: (item.item_name, item.id),
+        page_size=INVENTORY_PAGE_SIZE,
+        height=400,
+        border=ft.border.all(1, ft.Colors.GREY_300),
+        border_radius=8,
+        padding=10,
+    )
 
-    inventory_list = ft.Column()
-
-    def update_inventory_list():
-        inventory_list.controls.clear()
-        for item in inventory_items:
-            inventory_list.controls.append(
-                ft.ListTile(
-                    title=ft.Text(item.item_name),
-                    subtitle=ft.Text(
-                        f"الكمية: {item.quantity}, السعر: ${item.purchase_price}"
-                    ),
-                )
+    # Search box; while it holds text the matching items replace the table
+    search_results = ft.DataTable(columns=build_inventory_columns(), rows=[])
+    search_status = ft.Text("", size=12, color=ft.Colors.GREY)
+    search_view = ft.Container(
+        ft.Column([search_status, search_results], scroll=ft.ScrollMode.AUTO),
+        height=400,
+        border=ft.border.all(1, ft.Colors.GREY_300),
+        border_radius=8,
+        padding=10,
+        visible=False,
+    )
+
+    def show_search_results(query, items):
+        if items is not None:
+            search_results.rows = [
+                ft.DataRow(cells=build_inventory_cells(item)) for item in items
+            ]
+            search_status.value = (
+                f"عدد النتائج: {len(items)}" if items else "لا توجد نتائج"
             )
+        search_view.visible = items is not None
+        inventory_table.visible = items is None
+        page.update()
+
+    inventory_search = SearchController(
+        lambda query: db.search_inventory(query, SEARCH_RESULTS_LIMIT),
+        show_search_results,
+    )
+    search_field = ft.TextField(
+        label="بحث في المخزون",
+        prefix_icon=ft.Icons.SEARCH,
+        on_change=inventory_search.handle_change,
+    )
+
+    async def refresh_inventory():
+        """Reload the table and the current search after items were saved"""
+        await inventory_table.refresh()
+        inventory_search.clear()
+        await inventory_search.submit(search_field.value)
 
     return ft.Column(
         [
@@ -61,10 +183,14 @@ def create_inventory_tab(page: ft.Page):
             item_name,
             item_quantity,
             purchase_price,
-            add_inventory_btn,
+            description,
+            ft.Row([add_inventory_btn, queue_inventory_btn, save_pending_btn]),
+            pending_text,
             ft.Divider(),
             ft.Text("عناصر المخزون:", size=18, weight=ft.FontWeight.BOLD),
-            inventory_list,
+            search_field,
+            search_view,
+            inventory_table,
         ],
         scroll=ft.ScrollMode.AUTO,
     )
@@ -1,47 +1,71 @@
 import flet as ft
 
 # Local imports
-from database import db
+from async_database import async_db
+from report_engine import SECTION, TITLE, ReportPager
 
+# Report lines rendered per page
+REPORT_PAGE_SIZE = 100
 
-def create_reports_tab(page: ft.Page, financial_records, inventory_items):
+
+def build_report_line(kind, text):
+    """Build the control for one report line"""
+    if kind == TITLE:
+        return ft.Text(text, size=20, weight=ft.FontWeight.BOLD, selectable=True)
+    if kind == SECTION:
+        return ft.Text(text, size=16, weight=ft.FontWeight.BOLD, selectable=True)
+    return ft.Text(text, selectable=True)
+
+
+def create_reports_tab(page: ft.Page):
     """Create and return the reports tab"""
-    report_content = ft.TextField(
-        multiline=True, read_only=True, expand=True, border=ft.InputBorder.NONE
+    pager = ReportPager(page_size=REPORT_PAGE_SIZE)
+
+    # Only the current page of lines is ever sent to the client
+    report_content = ft.ListView(spacing=4, height=500)
+    page_label = ft.Text("")
+    previous_btn = ft.IconButton(
+        ft.Icons.CHEVRON_RIGHT, tooltip="الصفحة السابقة", disabled=True
+    )
+    next_btn = ft.IconButton(
+        ft.Icons.CHEVRON_LEFT, tooltip="الصفحة التالية", disabled=True
     )
 
-    def generate_report(e):
-        students_data = db.get_all_students()
-        total_students = len(students_data)
-        total_financial = sum(
-            float(record.monthly_fee) + float(record.bus_fee or 0)
-            for record in financial_records
-        )
-        total_inventory = sum(
-            float(item.quantity) * float(item.purchase_price or 0)
-            for item in inventory_items
-        )
-
-        report_content.value = f"""
-        تقرير نظام إدارة رياض الأطفال
-        =============================
-        
-        إجمالي الطلاب: {total_students}
-        القيمة المالية الإجمالية: ${total_financial:,.2f}
-        قيمة المخزون الإجمالية: ${total_inventory:,.2f}
-        
-        الطلاب:
-        {chr(10).join([f"- {s['name']} (العمر: {s['age']})" for s in students_data])}
-        
-        السجلات المالية:
-        {chr(10).join([f"- {r.student_name}: شهري ${r.monthly_fee}, باص ${r.bus_fee or 0}" for r in financial_records])}
-        
-        عناصر المخزون:
-        {chr(10).join([f"- {i.item_name}: {i.quantity} وحدة @ ${i.purchase_price or 0} لكل" for i in inventory_items])}
-        """
+    def show_lines(lines):
+        report_content.controls = [
+            build_report_line(kind, text) for kind, text in lines
+        ]
+        page_label.value = f"صفحة {pager.page_number}"
+        previous_btn.disabled = not pager.has_previous
+        next_btn.disabled = not pager.has_next
         page.update()
 
-    generate_report_btn = ft.ElevatedButton("إنشاء تقرير", on_click=generate_report)
+    generate_report_btn = ft.ElevatedButton("إنشاء تقرير")
+
+    async def load(move):
+        """Read a page on the worker pool with the navigation disabled"""
+        generate_report_btn.disabled = True
+        previous_btn.disabled = True
+        next_btn.disabled = True
+        page.update()
+        try:
+            show_lines(await async_db.run(move))
+        finally:
+            generate_report_btn.disabled = False
+            page.update()
+
+    async def generate_report(e):
+        await load(pager.first)
+
+    async def show_next_page(e):
+        await load(pager.next)
+
+    async def show_previous_page(e):
+        await load(pager.previous)
+
+    generate_report_btn.on_click = generate_report
+    previous_btn.on_click = show_previous_page
+    next_btn.on_click = show_next_page
 
     return ft.Column(
         [
@@ -50,6 +74,10 @@ def create_reports_tab(page: ft.Page, financial_records, inventory_items):
             generate_report_btn,
             ft.Divider(),
             report_content,
+            ft.Row(
+                [previous_btn, page_label, next_btn],
+                alignment=ft.MainAxisAlignment.CENTER,
+            ),
         ],
         scroll=ft.ScrollMode.AUTO,
         expand=True,
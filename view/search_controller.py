@@ -0,0 +1,90 @@
+import asyncio
+from collections import OrderedDict
+
+# Local imports
+from async_database import async_db
+
+# Wait this long after the last keystroke before querying the database
+DEBOUNCE_SECONDS = 0.25
+
+# Recent queries whose results are kept for instant reuse
+CACHE_SIZE = 32
+
+
+class SearchController:
+    """Debounced search-as-you-type for a text field.
+
+    Wire ``handle_change`` to a ``TextField``'s ``on_change``. Each keystroke
+    starts a new generation: a query only runs once typing pauses for
+    ``delay`` seconds, and results are applied only if no newer keystroke
+    has arrived meanwhile, so a slow query for an old prefix can never
+    overwrite the results for the current text. Waiting searches are
+    cancelled outright; one already running on the database worker pool
+    finishes there but its results are dropped.
+
+    Results of recent queries are kept in a small LRU cache, so
+    backspacing to a prefix that was already searched shows its results
+    without waiting. Call ``clear()`` after the searched data changes.
+
+    ``search(query)`` is a blocking callable run on the database worker
+    pool. ``show_results(query, results)`` applies results to the view
+    (and calls ``page.update()``); it gets ``results=None`` when the field
+    is emptied, meaning the unfiltered list should come back.
+    """
+
+    def __init__(
+        self,
+        search,
+        show_results,
+        delay=DEBOUNCE_SECONDS,
+        cache_size=CACHE_SIZE,
+    ):
+        self.search = search
+        self.show_results = show_results
+        self.delay = delay
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.generation = 0
+        self.task = None
+
+    @staticmethod
+    def normalize(text):
+        return " ".join((text or "").split()).casefold()
+
+    async def handle_change(self, e):
+        await self.submit(e.control.value)
+
+    async def submit(self, text):
+        """Start searching for ``text``, superseding any earlier search"""
+        self.generation += 1
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self.task = None
+
+        query = self.normalize(text)
+        if not query:
+            self.show_results(query, None)
+            return
+        if query in self.cache:
+            self.cache.move_to_end(query)
+            self.show_results(query, self.cache[query])
+            return
+        self.task = asyncio.create_task(self.run(query, self.generation))
+
+    async def run(self, query, generation):
+        try:
+            await asyncio.sleep(self.delay)
+            results = await async_db.run(self.search, query)
+        except asyncio.CancelledError:
+            return
+        if generation != self.generation:
+            return  # superseded while the query was running
+
+        self.cache[query] = results
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        self.show_results(query, results)
+
+    def clear(self):
+        """Forget cached results, e.g. after a row was added"""
+        self.cache.clear()
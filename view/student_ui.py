@@ -1,10 +1,76 @@
 import datetime
-import os
-import shutil
+import sqlite3
+import threading
+from collections import OrderedDict
 import flet as ft
 
 # Local imports
+from async_database import async_db
 from database import db
+from photo_storage import get_photo_store, thumbnail_source
+from student_import import import_students
+from view.search_controller import SearchController
+from view.virtual_table import VirtualDataTable
+
+# Rows fetched per page by the student table
+STUDENT_PAGE_SIZE = 50
+
+# Import errors listed under the progress bar; the rest are only counted
+IMPORT_ERRORS_SHOWN = 10
+
+# Best-ranked students shown for a search
+SEARCH_RESULTS_LIMIT = 50
+
+# Thumbnails kept for the rows on screen; covers the table window plus
+# search results
+THUMBNAIL_CACHE_SIZE = 5 * STUDENT_PAGE_SIZE
+
+
+def build_student_columns():
+    """Build the column headers of a student table"""
+    return [
+        ft.DataColumn(ft.Text("الصورة")),
+        ft.DataColumn(ft.Text("الرقم")),
+        ft.DataColumn(ft.Text("الاسم")),
+        ft.DataColumn(ft.Text("العمر")),
+        ft.DataColumn(ft.Text("تاريخ الميلاد")),
+        ft.DataColumn(ft.Text("رقم التليفون")),
+        ft.DataColumn(ft.Text("وظيفة الأب")),
+        ft.DataColumn(ft.Text("وظيفة الأم")),
+        ft.DataColumn(ft.Text("المشكلة")),
+        ft.DataColumn(ft.Text("تاريخ الزيارة")),
+    ]
+
+
+def build_photo_cell(student, thumbnail):
+    """Photo cell: the thumbnail, a placeholder if it is missing, or a dash"""
+    if thumbnail:
+        return ft.Image(**thumbnail, width=40, height=40, fit=ft.ImageFit.COVER)
+    if student.photo_path:
+        return ft.Icon(ft.Icons.IMAGE_OUTLINED, size=24, color=ft.Colors.GREY_400)
+    return ft.Text("-")
+
+
+def build_student_cells(student, thumbnail=None):
+    """Build the table cells for one student row.
+
+    ``thumbnail`` holds ``ft.Image`` arguments loaded beforehand off the
+    event loop (see ``photo_storage.thumbnail_source``); building the cells
+    does no I/O.
+    """
+    return [
+        ft.DataCell(build_photo_cell(student, thumbnail)),
+        ft.DataCell(ft.Text(str(student.id))),
+        ft.DataCell(ft.Text(student.name)),
+        ft.DataCell(ft.Text(str(student.age))),
+        # Dates print as YYYY-MM-DD and timestamps as YYYY-MM-DD HH:MM:SS
+        ft.DataCell(ft.Text(student.birth_date or "-")),
+        ft.DataCell(ft.Text(student.phone or "-")),
+        ft.DataCell(ft.Text(student.dad_job or "-")),
+        ft.DataCell(ft.Text(student.mum_job or "-")),
+        ft.DataCell(ft.Text(student.problem or "-")),
+        ft.DataCell(ft.Text(str(student.created_at or "-"))),
+    ]
 
 
 def create_student_registration_tab(page: ft.Page):
@@ -94,38 +160,87 @@ def create_student_registration_tab(page: ft.Page):
     problem = ft.TextField(label="المشكلة", multiline=True)
     additional_notes = ft.TextField(label="ملاحظات إضافية", multiline=True)
 
-    # Photo upload functionality
+    # Photo upload functionality; KINDERGARTEN_PHOTO_STORE selects whether
+    # new photos are stored as files or in the database
+    photo_store = get_photo_store()
     photo_path = None
     photo_preview = ft.Image(
         src="", width=100, height=100, fit=ft.ImageFit.COVER, visible=False
     )
     photo_status = ft.Text("لم يتم اختيار صورة", size=12, color=ft.Colors.GREY)
+    photo_progress = ft.ProgressBar(value=0, width=200, visible=False)
+    photo_cancel = threading.Event()
 
-    def handle_file_picker_result(e: ft.FilePickerResultEvent):
+    def cancel_photo_copy(e):
+        photo_cancel.set()
+
+    photo_cancel_btn = ft.TextButton(
+        "إلغاء", icon=ft.Icons.CANCEL, on_click=cancel_photo_copy, visible=False
+    )
+
+    def show_photo_copying(copying):
+        photo_progress.visible = copying
+        photo_cancel_btn.visible = copying
+        photo_upload_btn.disabled = copying
+
+    async def handle_file_picker_result(e: ft.FilePickerResultEvent):
         nonlocal photo_path
-        if e.files:
-            # Create student_photos directory if it doesn't exist
-            photos_dir = "student_photos"
-            if not os.path.exists(photos_dir):
-                os.makedirs(photos_dir)
-
-            # Copy the file to student_photos directory
-            uploaded_file = e.files[0]
-            file_extension = os.path.splitext(uploaded_file.name)[1]
-            new_filename = (
-                f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}{file_extension}"
-            )
-            photo_path = os.path.join(photos_dir, new_filename)
+        if not e.files:
+            return
+
+        # The previous photo no longer applies; photo_path is only set again
+        # once the new file is completely stored, so a student saved in the
+        # meantime never references a half-written file
+        uploaded_file = e.files[0]
+        photo_path = None
+        photo_cancel.clear()
+        photo_progress.value = 0
+        photo_preview.visible = False
+        photo_status.value = f"جارٍ نسخ: {uploaded_file.name}"
+        photo_status.color = ft.Colors.GREY
+        show_photo_copying(True)
+        page.update()
+
+        def report_progress(fraction):
+            photo_progress.value = fraction
+            photo_status.value = f"جارٍ نسخ: {uploaded_file.name} ({fraction:.0%})"
+            page.update()
 
-            # Copy the file
-            shutil.copy2(uploaded_file.path, photo_path)
+        # Copy the file into student_photos on a worker thread; slow disks
+        # and network shares must not block the event loop. Identical
+        # photos share one stored file
+        try:
+            stored_path = await async_db.run(
+                photo_store.store,
+                uploaded_file.path,
+                progress=report_progress,
+                cancel=photo_cancel,
+            )
+            if stored_path is not None:
+                await async_db.run(photo_store.make_thumbnails, stored_path)
+        except (OSError, sqlite3.Error) as ex:
+            show_photo_copying(False)
+            photo_status.value = f"فشل نسخ الصورة: {ex}"
+            photo_status.color = ft.Colors.RED
+            page.update()
+            return
 
-            # Update UI
-            photo_preview.src = photo_path
-            photo_preview.visible = True
-            photo_status.value = f"تم اختيار: {uploaded_file.name}"
-            photo_status.color = ft.Colors.GREEN
+        show_photo_copying(False)
+        if stored_path is None:
+            photo_status.value = "تم إلغاء رفع الصورة"
+            photo_status.color = ft.Colors.GREY
             page.update()
+            return
+
+        # Update UI; the preview uses the small thumbnail when available
+        photo_path = stored_path
+        preview = await async_db.run(photo_store.image_source, photo_path, 100)
+        photo_preview.src = preview.get("src")
+        photo_preview.src_base64 = preview.get("src_base64")
+        photo_preview.visible = bool(preview)
+        photo_status.value = f"تم اختيار: {uploaded_file.name}"
+        photo_status.color = ft.Colors.GREEN
+        page.update()
 
     file_picker = ft.FilePicker(on_result=handle_file_picker_result)
     page.overlay.append(file_picker)
@@ -141,10 +256,10 @@ def create_student_registration_tab(page: ft.Page):
         "رفع صورة الطالب", icon=ft.Icons.UPLOAD_FILE, on_click=pick_photo
     )
 
-    def add_student(e):
+    async def add_student(e):
         if student_name.value and student_age.value:
             # Add student to database with photo path
-            student_id = db.create_student(
+            student = await async_db.insert_student(
                 name=str(student_name.value),
                 age=int(student_age.value),
                 birth_date=str(birth_date.value),
@@ -152,10 +267,10 @@ def create_student_registration_tab(page: ft.Page):
                 dad_job=str(dad_job.value),
                 mum_job=str(mum_job.value),
                 problem=str(problem.value),
-                photo_path=str(photo_path),
+                photo_path=photo_path,
             )
 
-            if student_id != -1:
+            if student is not None:
                 # Clear form fields
                 student_name.value = ""
                 student_age.value = "0"
@@ -166,8 +281,13 @@ def create_student_registration_tab(page: ft.Page):
                 mum_job.value = ""
                 additional_notes.value = ""
 
-                # Refresh student table
-                update_student_table()
+                # Show the new row without reloading the table; it is sent
+                # to the client with the page.update() below
+                await async_db.run(load_thumbnails, [student])
+                student_table.insert_row(student)
+                # Cached search results do not include the new student
+                student_search.clear()
+                await student_search.submit(search_field.value)
 
                 snackbar = ft.SnackBar(
                     content=ft.Text("تم إضافة الطالب بنجاح!"),
@@ -193,57 +313,143 @@ def create_student_registration_tab(page: ft.Page):
 
     add_student_btn = ft.ElevatedButton("إضافة طالب", on_click=add_student)
 
-    # Student table with database integration
-    student_data_table = ft.DataTable(
-        columns=[
-            ft.DataColumn(ft.Text("الاسم")),
-            ft.DataColumn(ft.Text("العمر")),
-            ft.DataColumn(ft.Text("تاريخ الميلاد")),
-            ft.DataColumn(ft.Text("رقم التليفون")),
-            ft.DataColumn(ft.Text("وظيفة الأب")),
-            ft.DataColumn(ft.Text("وظيفة الأم")),
-            ft.DataColumn(ft.Text("المشكلة")),
-            ft.DataColumn(ft.Text("تاريخ الزيارة")),
-        ],
-        rows=[],
+    # Thumbnails by photo reference. They are read on the worker pool
+    # together with each page or search of students, so building rows on the
+    # event loop only looks them up.
+    thumbnails = OrderedDict()
+    thumbnails_lock = threading.Lock()
+
+    def load_thumbnails(students):
+        for student in students:
+            ref = student.photo_path
+            if not ref:
+                continue
+            with thumbnails_lock:
+                if ref in thumbnails:
+                    thumbnails.move_to_end(ref)
+                    continue
+            source = thumbnail_source(ref, 100)
+            with thumbnails_lock:
+                thumbnails[ref] = source
+                if len(thumbnails) > THUMBNAIL_CACHE_SIZE:
+                    thumbnails.popitem(last=False)
+        return students
+
+    def fetch_students_page(limit, after=None, before=None):
+        page = db.get_students_page(limit, after, before)
+        load_thumbnails(page.rows)
+        return page
+
+    def build_cells(student):
+        return build_student_cells(student, thumbnails.get(student.photo_path))
+
+    # Student table with database integration; only a window of pages is
+    # turned into controls, more are fetched while scrolling
+    student_table = VirtualDataTable(
+        columns=build_student_columns(),
+        fetch_page=fetch_students_page,
+        build_cells=build_cells,
+        sort_key=lambda student: (student.name, student.id),
+        page_size=STUDENT_PAGE_SIZE,
+        height=400,
+        border=ft.border.all(1, ft.Colors.GREY_300),
+        border_radius=8,
+        padding=10,
     )
 
-    def update_student_table():
-        # Get students from database
-        students_data = db.get_all_students()
-
-        if student_data_table.rows is None:
-            student_data_table.rows = []
-        else:
-            student_data_table.rows.clear()
-
-        for student in students_data:
-            student_data_table.rows.append(
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(ft.Text(student["name"])),
-                        ft.DataCell(ft.Text(str(student["age"]))),
-                        ft.DataCell(ft.Text(student["birth_date"] or "-")),
-                        ft.DataCell(ft.Text(student["phone"] or "-")),
-                        ft.DataCell(ft.Text(student["dad_job"] or "-")),
-                        ft.DataCell(ft.Text(student["mum_job"] or "-")),
-                        ft.DataCell(ft.Text(student.get("problem", "-") or "-")),
-                        ft.DataCell(
-                            ft.Text(
-                                datetime.datetime.fromisoformat(
-                                    student.get("created_at", "-")
-                                ).strftime("%Y-%m-%d %H:%M:%S")
-                                if student.get("created_at")
-                                else "-"
-                            )
-                        ),  # New cell for registration date
-                    ]
-                )
+    # Search box; while it holds text the ranked search results replace the
+    # full student table
+    search_results = ft.DataTable(columns=build_student_columns(), rows=[])
+    search_status = ft.Text("", size=12, color=ft.Colors.GREY)
+    search_view = ft.Container(
+        ft.Column([search_status, search_results], scroll=ft.ScrollMode.AUTO),
+        height=400,
+        border=ft.border.all(1, ft.Colors.GREY_300),
+        border_radius=8,
+        padding=10,
+        visible=False,
+    )
+
+    def show_search_results(query, students):
+        if students is not None:
+            search_results.rows = [
+                ft.DataRow(cells=build_cells(student)) for student in students
+            ]
+            search_status.value = (
+                f"عدد النتائج: {len(students)}" if students else "لا توجد نتائج"
+            )
+        search_view.visible = students is not None
+        student_table.visible = students is None
+        page.update()
+
+    student_search = SearchController(
+        lambda query: load_thumbnails(db.search_students(query, SEARCH_RESULTS_LIMIT)),
+        show_search_results,
+    )
+    search_field = ft.TextField(
+        label="بحث عن طالب (الاسم، التليفون، الوظيفة...)",
+        prefix_icon=ft.Icons.SEARCH,
+        on_change=student_search.handle_change,
+    )
+
+    # Bulk import from CSV/XLSX files
+    import_progress = ft.ProgressBar(value=0, width=400, visible=False)
+    import_status = ft.Text("", size=12)
+    import_errors = ft.Column(spacing=2)
+
+    async def handle_import_result(e: ft.FilePickerResultEvent):
+        if not e.files:
+            return
+
+        import_progress.value = 0
+        import_progress.visible = True
+        import_status.value = f"جارٍ استيراد: {e.files[0].name}"
+        import_status.color = None
+        import_errors.controls.clear()
+        page.update()
+
+        def report_progress(fraction, imported, errors):
+            import_progress.value = fraction
+            import_status.value = f"تم استيراد {imported} طالب، أخطاء: {errors}"
+            page.update()
+
+        try:
+            report = await async_db.run(
+                import_students, e.files[0].path, progress=report_progress
             )
+        except (OSError, ValueError, RuntimeError) as ex:
+            import_progress.visible = False
+            import_status.value = f"فشل الاستيراد: {ex}"
+            import_status.color = ft.Colors.RED
+            page.update()
+            return
+
+        import_status.value = (
+            f"تم استيراد {report.imported} طالب، "
+            f"عدد الصفوف المرفوضة: {len(report.errors)}"
+        )
+        import_status.color = ft.Colors.GREEN if report.ok else ft.Colors.ORANGE
+        import_errors.controls = [
+            ft.Text(f"سطر {error.line}: {error.message}", size=12, color=ft.Colors.RED)
+            for error in report.errors[:IMPORT_ERRORS_SHOWN]
+        ]
+        await student_table.refresh()
+        student_search.clear()
+        await student_search.submit(search_field.value)
         page.update()
 
-    # Load initial student data
-    update_student_table()
+    import_picker = ft.FilePicker(on_result=handle_import_result)
+    page.overlay.append(import_picker)
+
+    import_btn = ft.ElevatedButton(
+        "استيراد من ملف",
+        icon=ft.Icons.UPLOAD_FILE,
+        on_click=lambda e: import_picker.pick_files(
+            allow_multiple=False,
+            allowed_extensions=["csv", "xlsx"],
+            dialog_title="اختر ملف الطلاب (CSV أو XLSX)",
+        ),
+    )
 
     return ft.Column(
         [
@@ -263,19 +469,22 @@ def create_student_registration_tab(page: ft.Page):
             photo_upload_btn,
             ft.Row([photo_preview], alignment=ft.MainAxisAlignment.CENTER),
             photo_status,
+            ft.Row([photo_progress, photo_cancel_btn]),
             add_student_btn,
             ft.Divider(),
             ft.Row(
-                [ft.Text("الطلاب المسجلين:", size=18, weight=ft.FontWeight.BOLD)],
+                [
+                    ft.Text("الطلاب المسجلين:", size=18, weight=ft.FontWeight.BOLD),
+                    import_btn,
+                ],
                 alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
             ),
-            ft.Container(
-                content=ft.Column([student_data_table], scroll=ft.ScrollMode.AUTO),
-                height=400,
-                border=ft.border.all(1, ft.Colors.GREY_300),
-                border_radius=8,
-                padding=10,
-            ),
+            import_progress,
+            import_status,
+            import_errors,
+            search_field,
+            search_view,
+            student_table,
         ],
         scroll=ft.ScrollMode.AUTO,
         expand=True,
@@ -0,0 +1,165 @@
+from bisect import bisect_left
+from collections import deque
+
+import flet as ft
+
+# Local imports
+from async_database import async_db
+
+# Fixed row height so scroll offsets can be corrected exactly when pages are
+# dropped from the top of the window
+ROW_HEIGHT = 48
+
+# Load the neighbouring page when the viewport is this close to an edge
+EDGE_THRESHOLD = ROW_HEIGHT * 5
+
+
+class VirtualDataTable(ft.Container):
+    """DataTable that only holds a sliding window of pages as controls.
+
+    ``fetch_page(limit, after=None, before=None)`` must return a
+    ``database.Page``; it is called on the async database worker pool, never
+    on the event loop. The first page loads once the table is mounted, and
+    further pages are fetched with keyset cursors as the user
+    scrolls towards either edge, and once more than ``max_pages`` pages are
+    loaded the page furthest from the viewport is dropped. The number of
+    controls on the page therefore stays at ``page_size * max_pages`` no
+    matter how many rows the table has. ``sort_key(row)`` must return the
+    same ``(sort value, id)`` ordering the pages are fetched in.
+    """
+
+    def __init__(
+        self,
+        columns,
+        fetch_page,
+        build_cells,
+        sort_key,
+        page_size=50,
+        max_pages=3,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.fetch_page = fetch_page
+        self.build_cells = build_cells
+        self.sort_key = sort_key
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = deque()  # database.Page objects currently shown
+        self.loading = False
+
+        self.table = ft.DataTable(
+            columns=columns,
+            rows=[],
+            data_row_min_height=ROW_HEIGHT,
+            data_row_max_height=ROW_HEIGHT,
+        )
+        self.scroller = ft.Column(
+            [self.table],
+            scroll=ft.ScrollMode.AUTO,
+            on_scroll=self.handle_scroll,
+            on_scroll_interval=100,
+        )
+        self.content = self.scroller
+
+    def build_rows(self, rows):
+        return [ft.DataRow(cells=self.build_cells(row)) for row in rows]
+
+    def did_mount(self):
+        self.page.run_task(self.refresh)
+
+    async def fetch(self, **cursor):
+        return await async_db.run(self.fetch_page, self.page_size, **cursor)
+
+    async def refresh(self):
+        """Reset the window to the first page"""
+        first = await self.fetch()
+        self.pages.clear()
+        self.pages.append(first)
+        self.table.rows = self.build_rows(first.rows)
+        self.update()
+
+    async def load_next(self, pixels):
+        """Append the page after the window, dropping the first if needed"""
+        next_page = await self.fetch(after=self.pages[-1].next_cursor)
+        if not next_page.rows:
+            return
+        self.pages.append(next_page)
+        self.table.rows.extend(self.build_rows(next_page.rows))
+
+        offset = None
+        if len(self.pages) > self.max_pages:
+            dropped = self.pages.popleft()
+            del self.table.rows[: len(dropped.rows)]
+            # Keep the same rows under the viewport after removing rows above
+            offset = max(0, pixels - len(dropped.rows) * ROW_HEIGHT)
+        self.update()
+        if offset is not None:
+            self.scroller.scroll_to(offset=offset, duration=0)
+
+    async def load_previous(self, pixels):
+        """Prepend the page before the window, dropping the last if needed"""
+        previous = await self.fetch(before=self.pages[0].prev_cursor)
+        if not previous.rows:
+            return
+        self.pages.appendleft(previous)
+        self.table.rows[:0] = self.build_rows(previous.rows)
+
+        if len(self.pages) > self.max_pages:
+            dropped = self.pages.pop()
+            del self.table.rows[-len(dropped.rows) :]
+        self.update()
+        self.scroller.scroll_to(
+            offset=pixels + len(previous.rows) * ROW_HEIGHT, duration=0
+        )
+
+    def insert_row(self, row):
+        """Insert one new row at its sorted position inside the window.
+
+        Only the new ``DataRow`` is added, so the next ``page.update()``
+        sends just that row. Rows that sort outside the loaded window are
+        skipped; they are fetched with their page once the user scrolls
+        there. Returns True if the row was inserted.
+        """
+        if not self.pages:
+            return False
+
+        key = self.sort_key(row)
+        keys = [self.sort_key(r) for loaded in self.pages for r in loaded.rows]
+        if keys:
+            if key < keys[0] and self.pages[0].prev_cursor is not None:
+                return False
+            if key > keys[-1] and self.pages[-1].next_cursor is not None:
+                return False
+
+        position = bisect_left(keys, key)
+        # Keep the per-page row lists in step with the table rows so that
+        # dropping a page later removes the right number of rows
+        offset = 0
+        for index, loaded in enumerate(self.pages):
+            if position <= offset + len(loaded.rows) or index == len(self.pages) - 1:
+                loaded.rows.insert(position - offset, row)
+                # Move the page's cursors to its new edge rows so fetching a
+                # neighbouring page later does not return this row again
+                first, last = loaded.rows[0], loaded.rows[-1]
+                self.pages[index] = loaded._replace(
+                    next_cursor=self.sort_key(last) if loaded.next_cursor else None,
+                    prev_cursor=self.sort_key(first) if loaded.prev_cursor else None,
+                )
+                break
+            offset += len(loaded.rows)
+
+        self.table.rows.insert(position, ft.DataRow(cells=self.build_cells(row)))
+        return True
+
+    async def handle_scroll(self, e: ft.OnScrollEvent):
+        if self.loading or not self.pages:
+            return
+        self.loading = True
+        try:
+            extent_after = e.max_scroll_extent - e.pixels
+            if extent_after < EDGE_THRESHOLD and self.pages[-1].next_cursor:
+                await self.load_next(e.pixels)
+            elif e.pixels < EDGE_THRESHOLD and self.pages[0].prev_cursor:
+                await self.load_previous(e.pixels)
+        finally:
+            self.loading = False